@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.core.urlresolvers import reverse
+from django.db import models
+
+
+class Author(models.Model):
+    username = models.CharField(max_length=50)
+
+
+class Article(models.Model):
+    name = models.CharField(max_length=100)
+    author = models.ForeignKey(Author, null=True, blank=True)
+
+    DEFAULT_SEO_TITLES = {'en': '{name} by {author.username}'}
+    DEFAULT_SEO_DESCRIPTIONS = {'en': 'All about {name}'}
+
+    def get_absolute_url(self):
+        return reverse('article', args=[self.pk])
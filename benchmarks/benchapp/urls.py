@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.conf.urls import patterns, url
+from django.http import HttpResponse
+
+urlpatterns = patterns(
+    '',
+    url(r'^articles/(?P<pk>\d+)/$', lambda request, pk: HttpResponse(pk), name='article'),
+)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+"""
+fallback.py
+
+    Measures the per-request cost of choosing the fallback metadata of a
+    path: hashing the path and reading the DEFAULT_SEO_* settings.
+
+    $> python benchmarks/fallback.py
+
+"""
+import hashlib
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=['django.contrib.contenttypes', 'painlessseo'],
+    USE_I18N=True,
+    LANGUAGE_CODE='en',
+    LANGUAGES=(('en', 'English'), ('es', 'Spanish')),
+    DEFAULT_SEO_TITLES={
+        'en': ['Title %d' % index for index in range(10)],
+        'es': ['Titulo %d' % index for index in range(10)],
+    },
+    DEFAULT_SEO_DESCRIPTIONS={
+        'en': 'Description',
+        'es': ['Descripcion %d' % index for index in range(5)],
+    },
+)
+if hasattr(django, 'setup'):
+    django.setup()
+
+from django.utils.encoding import smart_str
+
+from painlessseo import settings as seo_settings
+from painlessseo import utils
+
+PATH = '/camping/spain/andalucia/some-long-glamping-site-name/'
+NUMBER = 100000
+
+
+def legacy_fallback_metadata(lang_code, index=0):
+    # Implementation previous to precomputing the fallback tables
+    titles = seo_settings.FALLBACK_TITLE
+    descriptions = seo_settings.FALLBACK_DESCRIPTION
+    lang = lang_code
+    if isinstance(titles, dict):
+        if lang_code not in titles:
+            lang = seo_settings.DEFAULT_LANG_CODE
+        title = titles[lang]
+        if isinstance(title, list):
+            title = title[index % len(title)]
+
+    if isinstance(descriptions, dict):
+        if lang_code not in descriptions:
+            lang = seo_settings.DEFAULT_LANG_CODE
+        description = descriptions[lang]
+        if isinstance(description, list):
+            description = description[index % len(description)]
+
+    return {
+        'title': title,
+        'description': description,
+        }
+
+
+def legacy():
+    index = int(hashlib.md5(smart_str(PATH)).hexdigest(), 16)
+    return legacy_fallback_metadata('es', index=index)
+
+
+def current():
+    return utils.get_fallback_metadata('es', index=utils.get_path_hash(PATH))
+
+
+def measure(name, func):
+    elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+    print('%-20s %8.3f us/call' % (name, elapsed * 1000000 / NUMBER))
+
+
+if __name__ == '__main__':
+    measure('legacy (md5)', legacy)
+    seo_settings.PATH_HASH = 'md5'
+    assert current() == legacy()
+    measure('precomputed (md5)', current)
+    seo_settings.PATH_HASH = 'crc32'
+    measure('precomputed (crc32)', current)
@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+"""
+resolution.py
+
+    Benchmarks the SEO resolution hot path on an in-memory SQLite database
+    filled with synthetic data: get_path_metadata for exact, parameterized,
+    fallback and registered model paths, the {% get_seo %} tag and the
+    sync_seo_models command, and the memory allocated per call. Results are
+    written as JSON, so they can be compared between versions.
+
+    $> python benchmarks/resolution.py --exact 1000 --parameterized 200 \\
+           --registered 5 --languages 2 --output results.json
+
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from StringIO import StringIO
+from timeit import default_timer
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+LANGUAGE_CODES = ['en', 'es', 'fr', 'de', 'it', 'pt', 'nl', 'ru', 'ja', 'zh']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the SEO resolution hot path.')
+    parser.add_argument('--exact', type=int, default=1000,
+                        help='Number of exact SeoMetadata paths per language')
+    parser.add_argument('--parameterized', type=int, default=200,
+                        help='Number of parameterized SeoMetadata paths per language')
+    parser.add_argument('--registered', type=int, default=5,
+                        help='Number of SeoRegisteredModel templates per language')
+    parser.add_argument('--languages', type=int, default=2,
+                        help='Number of languages (max %d)' % len(LANGUAGE_CODES))
+    parser.add_argument('--instances', type=int, default=1000,
+                        help='Number of model instances used by the sync benchmarks')
+    parser.add_argument('--iterations', type=int, default=1000,
+                        help='Calls measured for each resolution benchmark')
+    parser.add_argument('--cache', action='store_true', default=False,
+                        help='Enable the resolved metadata cache (SEO_CACHE_ENABLED)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed, to get the same calls on every run')
+    parser.add_argument('--output', default=None,
+                        help='File to write the JSON results to (default: stdout)')
+    options = parser.parse_args(argv)
+    options.languages = max(1, min(options.languages, len(LANGUAGE_CODES)))
+    return options
+
+
+def configure(options):
+    import django
+    from django.conf import settings
+
+    languages = [(code, code) for code in LANGUAGE_CODES[:options.languages]]
+    settings.configure(
+        DEBUG=False,
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'painlessseo',
+            'benchapp',
+        ],
+        ROOT_URLCONF='benchapp.urls',
+        USE_I18N=True,
+        LANGUAGE_CODE='en',
+        LANGUAGES=languages,
+        DEFAULT_SEO_TITLES=dict((code, ['Title %s {0}' % code, 'Other title %s' % code])
+                                for code, name in languages),
+        DEFAULT_SEO_DESCRIPTIONS=dict((code, 'Description %s' % code)
+                                      for code, name in languages),
+        SEO_MODELS=[('benchapp', 'article')],
+        SEO_CACHE_ENABLED=options.cache,
+    )
+    if hasattr(django, 'setup'):
+        django.setup()
+
+
+def create_data(options):
+    from django.contrib.contenttypes.models import ContentType
+    from django.core.management import call_command
+
+    from painlessseo import settings as seo_settings
+    from painlessseo.models import SeoMetadata, SeoRegisteredModel
+    from benchapp.models import Article, Author
+
+    call_command('syncdb', interactive=False, verbosity=0)
+
+    ctype = ContentType.objects.get_for_model(Article)
+    sms = []
+    registered = []
+    for lang_code, lang_name in seo_settings.SEO_LANGUAGES:
+        for index in range(options.exact):
+            sms.append(SeoMetadata(
+                lang_code=lang_code, path='/exact/%d/' % index,
+                title='Exact %d' % index, description='Exact description %d' % index))
+        for index in range(options.parameterized):
+            sms.append(SeoMetadata(
+                lang_code=lang_code, path='/section%d/{0}/' % index, has_parameters=True,
+                title='Section %d {0}' % index, description='Section description {0}'))
+        for index in range(options.registered):
+            registered.append(SeoRegisteredModel(
+                content_type=ctype, lang_code=lang_code,
+                title='{name} by {author.username} (%d)' % index,
+                description='All about {name} (%d)' % index))
+
+    for sm in sms:
+        # bulk_create does not call save
+        sm.update_path_fields()
+    SeoMetadata.objects.bulk_create(sms)
+    SeoRegisteredModel.objects.bulk_create(registered)
+
+    author = Author.objects.create(username='painlessseo')
+    Article.objects.bulk_create([
+        Article(name='Article %d' % index, author=author)
+        for index in range(options.instances)])
+
+
+def summarize(timings, queries):
+    timings = sorted(timings)
+    count = len(timings)
+    return {
+        'iterations': count,
+        'mean_us': sum(timings) / count * 1000000,
+        'median_us': timings[count // 2] * 1000000,
+        'p95_us': timings[min(int(count * 0.95), count - 1)] * 1000000,
+        'min_us': timings[0] * 1000000,
+        'queries_per_call': float(queries) / count,
+    }
+
+
+def measure(func, calls):
+    """
+    Runs func once for every set of arguments in calls, timing each call
+    and counting the queries issued in the same pass, so the caches filled
+    by the first calls weigh the same on both numbers.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    with CaptureQueriesContext(connection) as context:
+        for args in calls:
+            start = default_timer()
+            func(*args)
+            timings.append(default_timer() - start)
+
+    return summarize(timings, len(context.captured_queries))
+
+
+def benchmark_resolution(options, rand):
+    from painlessseo import settings as seo_settings
+    from painlessseo.utils import get_path_metadata
+    from benchapp.models import Article
+
+    lang_codes = [lang_code for lang_code, lang_name in seo_settings.SEO_LANGUAGES]
+    articles = list(Article.objects.select_related('author')[:100])
+
+    def calls(make_path, with_instance=False):
+        result = []
+        for iteration in range(options.iterations):
+            instance = rand.choice(articles) if with_instance else None
+            result.append((make_path(), rand.choice(lang_codes), instance))
+        return result
+
+    def resolve(path, lang_code, instance):
+        return get_path_metadata(path, lang_code, instance=instance, seo_context={})
+
+    cases = [
+        ('get_path_metadata.exact', calls(
+            lambda: '/exact/%d/' % rand.randrange(max(options.exact, 1)))),
+        ('get_path_metadata.parameterized', calls(
+            lambda: '/section%d/slug-%d/' % (rand.randrange(max(options.parameterized, 1)),
+                                             rand.randrange(1000)))),
+        ('get_path_metadata.fallback', calls(
+            lambda: '/missing/%d/' % rand.randrange(1000000))),
+        ('get_path_metadata.registered_model', calls(
+            lambda: '/missing/%d/' % rand.randrange(1000000), with_instance=True)),
+    ]
+
+    results = {}
+    for name, case_calls in cases:
+        # Warm up in-memory indexes
+        resolve(*case_calls[0])
+        results[name] = measure(resolve, case_calls)
+    return results
+
+
+def get_size(value, seen=None):
+    """
+    Approximate memory used by a value and all the objects it references,
+    counting shared objects once.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen or isinstance(value, type):
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += get_size(key, seen) + get_size(item, seen)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += get_size(item, seen)
+    if hasattr(value, '__dict__'):
+        size += get_size(value.__dict__, seen)
+    for klass in type(value).__mro__:
+        for name in klass.__dict__.get('__slots__', ()):
+            size += get_size(getattr(value, name, None), seen)
+    return size
+
+
+def benchmark_memory(options):
+    from painlessseo import settings as seo_settings
+    from painlessseo.matcher import path_index
+    from painlessseo.models import SeoMetadata
+    from painlessseo.paths import compile_path, literal_prefix
+
+    lang_code = seo_settings.SEO_LANGUAGES[0][0]
+    buckets, irregular = path_index.build(lang_code)
+    patterns = list(irregular)
+    for bucket in buckets.values():
+        patterns.extend(bucket)
+    count = max(len(patterns), 1)
+
+    # What previous versions kept: a (prefix, regex, instance) per pattern
+    instances = [
+        (literal_prefix(seometadata.path), compile_path(seometadata.path), seometadata)
+        for seometadata in SeoMetadata.objects.filter(
+            lang_code=lang_code, has_parameters=True).order_by('id')]
+
+    return {'path_index.memory': {
+        'patterns': len(patterns),
+        'buckets': len(buckets),
+        'bytes_per_pattern': float(get_size(patterns)) / count,
+        'model_instance_bytes_per_pattern': float(get_size(instances)) / count,
+    }}
+
+
+def get_new_objects_size(objects, excluded):
+    """
+    Shallow size of the objects tracked by the garbage collector that are
+    not in 'objects' (a set of ids) nor in 'excluded'.
+    """
+    size = 0
+    for value in gc.get_objects():
+        if id(value) not in objects and id(value) not in excluded:
+            size += sys.getsizeof(value)
+    return size
+
+
+def measure_allocations(func, calls):
+    """
+    Runs func for every set of arguments in calls, measuring the time and
+    memory per call:
+
+    - result_bytes_per_call: size of the values returned.
+    - retained_bytes_per_call: bytes still allocated after all the calls.
+      Traced with tracemalloc when available (python 3, or python 2.7
+      patched for pytracemalloc). Otherwise it is the size of the new
+      objects tracked by the garbage collector, so strings and numbers
+      kept only by those objects are not counted.
+    - peak_bytes_per_call: bytes allocated at the peak of each call, only
+      with tracemalloc.
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+
+    count = len(calls)
+    result_bytes = 0
+    peaks = []
+    elapsed = 0.0
+
+    gc.collect()
+    objects = set(id(value) for value in gc.get_objects())
+    if tracemalloc is not None:
+        tracemalloc.start()
+        initial, peak = tracemalloc.get_traced_memory()
+
+    for args in calls:
+        if tracemalloc is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        start = default_timer()
+        value = func(*args)
+        elapsed += default_timer() - start
+        if tracemalloc is not None and hasattr(tracemalloc, 'reset_peak'):
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        result_bytes += get_size(value)
+        value = None
+
+    result = {
+        'iterations': count,
+        'mean_us': elapsed / count * 1000000,
+        'result_bytes_per_call': float(result_bytes) / count,
+        'peak_bytes_per_call': float(sum(peaks)) / len(peaks) if peaks else None,
+    }
+    gc.collect()
+    if tracemalloc is not None:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['retained_bytes_per_call'] = float(current - initial) / count
+    else:
+        # Objects created by this function, not by the calls
+        excluded = set([id(objects), id(peaks), id(result), id(sys._getframe())])
+        result['retained_bytes_per_call'] = float(
+            get_new_objects_size(objects, excluded)) / count
+    return result
+
+
+def benchmark_allocations(options, rand):
+    from painlessseo import settings as seo_settings
+    from painlessseo.utils import get_path_metadata
+    from benchapp.models import Article
+
+    lang_codes = [lang_code for lang_code, lang_name in seo_settings.SEO_LANGUAGES]
+    articles = list(Article.objects.select_related('author')[:100])
+
+    def calls(make_path, with_instance=False):
+        return [
+            (make_path(), rand.choice(lang_codes),
+             rand.choice(articles) if with_instance else None)
+            for iteration in range(options.iterations)]
+
+    def resolve(path, lang_code, instance):
+        # Default seo_context, so changes to shared state show up as retained
+        return get_path_metadata(path, lang_code, instance=instance)
+
+    cases = [
+        ('allocations.exact', calls(
+            lambda: '/exact/%d/' % rand.randrange(max(options.exact, 1)))),
+        ('allocations.parameterized', calls(
+            lambda: '/section%d/slug-%d/' % (rand.randrange(max(options.parameterized, 1)),
+                                             rand.randrange(1000)))),
+        ('allocations.registered_model', calls(
+            lambda: '/missing/%d/' % rand.randrange(1000000), with_instance=True)),
+    ]
+
+    results = {}
+    for name, case_calls in cases:
+        # Warm up in-memory indexes
+        for args in case_calls:
+            resolve(*args)
+        results[name] = measure_allocations(resolve, case_calls)
+    return results
+
+
+def benchmark_template(options, rand):
+    from django.template import Context, Template
+    from django.test.client import RequestFactory
+    from django.utils import translation
+
+    from painlessseo import settings as seo_settings
+
+    lang_codes = [lang_code for lang_code, lang_name in seo_settings.SEO_LANGUAGES]
+    template = Template('{% load seo %}{% get_seo %}')
+    factory = RequestFactory()
+
+    def render(path, lang_code):
+        translation.activate(lang_code)
+        return template.render(Context({'request': factory.get(path)}))
+
+    calls = [
+        ('/exact/%d/' % rand.randrange(max(options.exact, 1)), rand.choice(lang_codes))
+        for iteration in range(options.iterations)]
+    render(*calls[0])
+    result = measure(render, calls)
+    translation.deactivate()
+    return {'get_seo.render': result}
+
+
+def benchmark_sync(options):
+    from django.contrib.contenttypes.models import ContentType
+    from django.core.management import call_command
+
+    from painlessseo import settings as seo_settings
+    from painlessseo.models import SeoMetadata
+    from benchapp.models import Article
+
+    ctype = ContentType.objects.get_for_model(Article)
+    lang_codes = ' '.join([lang_code for lang_code, lang_name in seo_settings.SEO_LANGUAGES])
+    results = {}
+    for name, extra, resync in [('sync_seo_models', {}, False),
+                                ('sync_seo_models.resync', {}, True),
+                                ('sync_seo_models.bulk', {'bulk': True}, False),
+                                ('sync_seo_models.bulk.resync', {'bulk': True}, True)]:
+        if not resync:
+            SeoMetadata.objects.filter(content_type=ctype).delete()
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            start = default_timer()
+            call_command('sync_seo_models', sync_instances=True, update_langs=lang_codes,
+                         seo_models=[('benchapp', 'article')], **extra)
+            elapsed = default_timer() - start
+        finally:
+            sys.stdout = stdout
+        rows = SeoMetadata.objects.filter(content_type=ctype).count()
+        results[name] = {
+            'instances': options.instances,
+            'rows': rows,
+            'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed else None,
+        }
+    return results
+
+
+def run(options):
+    import django
+
+    configure(options)
+    create_data(options)
+    rand = random.Random(options.seed)
+
+    results = {}
+    results.update(benchmark_resolution(options, rand))
+    results.update(benchmark_template(options, rand))
+    results.update(benchmark_memory(options))
+    results.update(benchmark_allocations(options, rand))
+    results.update(benchmark_sync(options))
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'config': {
+            'exact': options.exact,
+            'parameterized': options.parameterized,
+            'registered': options.registered,
+            'languages': options.languages,
+            'instances': options.instances,
+            'iterations': options.iterations,
+            'cache': options.cache,
+            'seed': options.seed,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    report = run(options)
+
+    for name in sorted(report['results']):
+        result = report['results'][name]
+        if 'retained_bytes_per_call' in result:
+            peak = result['peak_bytes_per_call']
+            sys.stderr.write(
+                '%-36s %10.1f us/call %8s peak %8.0f result %8.1f left bytes/call\n' % (
+                    name, result['mean_us'], '-' if peak is None else '%.0f' % peak,
+                    result['result_bytes_per_call'], result['retained_bytes_per_call']))
+        elif 'mean_us' in result:
+            sys.stderr.write('%-36s %10.1f us/call %6.2f queries/call\n' % (
+                name, result['mean_us'], result['queries_per_call']))
+        elif 'bytes_per_pattern' in result:
+            sys.stderr.write('%-36s %10.1f bytes/pattern (%.1f as model instances)\n' % (
+                name, result['bytes_per_pattern'], result['model_instance_bytes_per_pattern']))
+        else:
+            sys.stderr.write('%-36s %10.1f rows/s\n' % (name, result['rows_per_second']))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
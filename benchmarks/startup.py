@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+"""
+startup.py
+
+    Measures the time spent and the queries run while importing the
+    painlessseo modules loaded on process start (admin, template tags and
+    the signals of SEO_MODELS), each run in a fresh process.
+
+    $> python benchmarks/startup.py --runs 20 --output startup.json
+
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from timeit import default_timer
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the painlessseo startup.')
+    parser.add_argument('--runs', type=int, default=20,
+                        help='Number of processes started')
+    parser.add_argument('--languages', type=int, default=2,
+                        help='Number of languages')
+    parser.add_argument('--output', default=None,
+                        help='File to write the JSON results to (default: stdout)')
+    parser.add_argument('--child', action='store_true', default=False,
+                        help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def run_child(options):
+    from resolution import configure, parse_args as parse_resolution_args
+
+    configure(parse_resolution_args(['--languages', str(options.languages)]))
+
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    # Content types must exist, as in any deployed site
+    call_command('syncdb', interactive=False, verbosity=0)
+
+    with CaptureQueriesContext(connection) as context:
+        start = default_timer()
+        import painlessseo.admin
+        import painlessseo.templatetags.seo
+        elapsed = default_timer() - start
+
+    sys.stdout.write(json.dumps({
+        'seconds': elapsed,
+        'queries': len(context.captured_queries),
+    }) + '\n')
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.child:
+        return run_child(options)
+
+    runs = []
+    for run in range(options.runs):
+        output = subprocess.check_output([
+            sys.executable, os.path.abspath(__file__), '--child',
+            '--languages', str(options.languages)])
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    timings = sorted([run['seconds'] for run in runs])
+    report = {
+        'runs': len(runs),
+        'languages': options.languages,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'median_ms': timings[len(timings) // 2] * 1000,
+        'min_ms': timings[0] * 1000,
+        'queries': max([run['queries'] for run in runs]),
+    }
+    sys.stderr.write('startup: %.1f ms (median), %d queries\n' % (
+        report['median_ms'], report['queries']))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
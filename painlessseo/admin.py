@@ -5,10 +5,9 @@ from django.contrib import admin
 from django.core import exceptions
 from django.contrib.contenttypes import generic
 from django.contrib.contenttypes.models import ContentType
+from painlessseo.cache import registered_metadata
 from painlessseo.models import SeoMetadata, SeoRegisteredModel
-from painlessseo.utils import register_seo_signals
-from django.utils.translation import activate, get_language
-from django.contrib.contenttypes.models import ContentType
+from painlessseo.utils import get_absolute_urls, register_seo_signals
 from django import forms
 
 
@@ -25,12 +24,12 @@ class RegisteredSeoModelsFilter(admin.SimpleListFilter):
         in the right sidebar.
         """
 
+        # Taken from the in-memory table, reloaded on SeoRegisteredModel changes
         res = []
-        models = SeoRegisteredModel.objects.values(
-            'content_type__id', 'content_type__model').distinct()
-        for seomodel in list(models):
-            res.append((seomodel['content_type__id'], seomodel['content_type__model']))
-        return res
+        for content_type_id in registered_metadata.get_content_type_ids():
+            ctype = ContentType.objects.get_for_id(content_type_id)
+            res.append((content_type_id, ctype.model))
+        return sorted(res, key=lambda lookup: lookup[1])
 
     def queryset(self, request, queryset):
         if self.value():
@@ -41,28 +40,33 @@ class RegisteredSeoModelsFilter(admin.SimpleListFilter):
 
 class SeoMetadataInlineFormSet(generic.BaseGenericInlineFormSet):
     def clean(self):
-        for form in self.forms:
-            if form.cleaned_data:
-                data = form.cleaned_data
-                instance = self.instance
-                if not data["id"]:
-                    # It is a creation, so check for existance
-                    ctype = ContentType.objects.get_for_model(instance)
-                    equal_lang = SeoMetadata.objects.filter(
-                        content_type=ctype,
-                        object_id=instance.id,
-                        lang_code=data["lang_code"],)
-
-                    if equal_lang.exists():
-                        raise exceptions.ValidationError(
-                            'Already exists a SEO Metadata for this object and language %s.' % data["lang_code"])
-
-                # Compute path and update if neccessary
-                active_language = get_language()
-                activate(data["lang_code"])
-                path = instance.get_absolute_url()
-                form.cleaned_data['path'] = path
-                activate(active_language)
+        forms = [form for form in self.forms if form.cleaned_data]
+        instance = self.instance
+
+        # Check all the new forms for existance at once
+        created_langs = set([
+            form.cleaned_data["lang_code"] for form in forms
+            if not form.cleaned_data["id"]])
+        if created_langs and instance.pk is not None:
+            ctype = ContentType.objects.get_for_model(instance)
+            equal_langs = SeoMetadata.objects.filter(
+                content_type=ctype,
+                object_id=instance.id,
+                lang_code__in=list(created_langs),
+                ).values_list('lang_code', flat=True)[:1]
+            if equal_langs:
+                raise exceptions.ValidationError(
+                    'Already exists a SEO Metadata for this object and language %s.' % equal_langs[0])
+
+        # Compute path and update if neccessary, once per language
+        absolute_urls = get_absolute_urls(
+            [instance], set([form.cleaned_data["lang_code"] for form in forms]))
+        for form in forms:
+            path = absolute_urls[
+                (instance.__class__, instance.pk, form.cleaned_data["lang_code"])]
+            form.cleaned_data['path'] = path
+            # Django >= 1.8 builds the instance before the formset is cleaned
+            form.instance.path = path
 
         return super(SeoMetadataInlineFormSet, self).clean()
 
@@ -76,6 +80,7 @@ class SeoMetadataInline(generic.GenericTabularInline):
 
 class SeoRegisteredModelAdmin(admin.ModelAdmin):
     list_display = ('content_type', 'lang_code', 'title', 'description')
+    list_select_related = ('content_type', )
     list_filter = ('lang_code', RegisteredSeoModelsFilter)
     search_fields = ['title', 'description', ]
 
@@ -89,10 +94,20 @@ class AddSeoMetadataForm(forms.ModelForm):
 
 class SeoMetadataAdmin(admin.ModelAdmin):
     add_form = AddSeoMetadataForm
-    list_display = ('path', 'lang_code', 'has_parameters')
+    list_display = ('path', 'lang_code', 'has_parameters', 'content_type')
+    list_select_related = ('content_type', )
+    list_per_page = 50
     search_fields = ['path', ]
     list_filter = ('lang_code', 'has_parameters', )
 
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if search_term.startswith('/'):
+            # Path prefix search, which can use the path index
+            return queryset.filter(path__startswith=search_term), False
+        return super(SeoMetadataAdmin, self).get_search_results(
+            request, queryset, search_term)
+
     def get_form(self, request, obj=None, **kwargs):
         """
         Use special form during user creation
@@ -109,4 +124,5 @@ class SeoMetadataAdmin(admin.ModelAdmin):
 admin.site.register(SeoRegisteredModel, SeoRegisteredModelAdmin)
 admin.site.register(SeoMetadata, SeoMetadataAdmin)
 
+# Done by PainlessSeoConfig.ready on django >= 1.7, harmless to repeat
 register_seo_signals()
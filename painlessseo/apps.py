@@ -0,0 +1,18 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.apps import AppConfig
+
+
+class PainlessSeoConfig(AppConfig):
+    """
+    Only used by django >= 1.7. Older versions register the signals of
+    SEO_MODELS when painlessseo.admin is imported.
+    """
+    name = 'painlessseo'
+    verbose_name = 'Painless SEO'
+
+    def ready(self):
+        # Also connects the cache invalidation handlers
+        from painlessseo.utils import register_seo_signals
+        register_seo_signals()
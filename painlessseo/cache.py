@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.models.signals import post_save, post_delete
+from django.utils.encoding import smart_str
+
+from painlessseo import settings
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+
+try:
+    from django.core.cache import caches
+except ImportError:
+    caches = None
+    from django.core.cache import get_cache
+
+
+def get_cache_backend(alias):
+    if caches is not None:
+        return caches[alias]
+    return get_cache(alias)
+
+
+class LRUCache(object):
+    """
+    Bounded, thread safe, in-memory cache that discards the least
+    recently used entries first. Entries expire after 'timeout' seconds,
+    or never if timeout is None.
+    """
+
+    def __init__(self, max_size=1000, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires < time.time():
+                return default
+            # Keep it as the most recently used entry
+            self._data[key] = (expires, value)
+            return value
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        expires = None
+        if self.timeout is not None:
+            expires = time.time() + self.timeout
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheGeneration(object):
+    """
+    Generation number stored in the django cache. Keys built using it
+    become unreachable for all the processes as soon as it is bumped.
+    """
+
+    def __init__(self, key, alias='default'):
+        self.key = key
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return get_cache_backend(self.alias)
+
+    def get(self):
+        generation = self.backend.get(self.key)
+        if generation is None:
+            # Start from a value unlikely to have been used before, so
+            # entries stored before the key got evicted are not reused.
+            generation = int(time.time())
+            if not self.backend.add(self.key, generation, None):
+                generation = self.backend.get(self.key) or generation
+        return generation
+
+    def bump(self):
+        try:
+            return self.backend.incr(self.key)
+        except ValueError:
+            # Generation key not found, so start a new one
+            generation = int(time.time())
+            self.backend.set(self.key, generation, None)
+            return generation
+
+
+class InvalidationBatch(threading.local):
+    """
+    Per-thread state of the batch_invalidations blocks: the number of
+    active ones and the invalidation callbacks to run when they exit.
+    Callbacks run inside a transaction are kept too, to be run again once
+    it has ended (see run_uncommitted_invalidations).
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = OrderedDict()
+        self.uncommitted = OrderedDict()
+
+    def is_pending(self, callback):
+        return callback in self.pending
+
+
+invalidation_batch = InvalidationBatch()
+
+
+def run_invalidation(callback):
+    if connection.in_atomic_block:
+        # Until the transaction commits, other processes may store the old
+        # rows again under the new generation
+        invalidation_batch.uncommitted[callback] = True
+    else:
+        run_uncommitted_invalidations()
+    callback()
+
+
+def run_uncommitted_invalidations(**kwargs):
+    """
+    Runs again the invalidation callbacks run inside a transaction, if it
+    has ended. Called when each request finishes, and before any other
+    invalidation done outside a transaction.
+    """
+    if connection.in_atomic_block or not invalidation_batch.uncommitted:
+        return
+    uncommitted = invalidation_batch.uncommitted
+    invalidation_batch.uncommitted = OrderedDict()
+    for callback in uncommitted:
+        callback()
+
+
+def invalidate_later(callback):
+    """
+    Runs an invalidation callback, or queues it until the outermost
+    batch_invalidations block exits. Each callback is run once.
+    """
+    if invalidation_batch.depth:
+        invalidation_batch.pending[callback] = True
+    else:
+        run_invalidation(callback)
+
+
+@contextmanager
+def batch_invalidations():
+    """
+    Coalesces the invalidations of the shared caches triggered by saving
+    or deleting SeoMetadata and SeoRegisteredModel instances inside the
+    block, so each generation number is bumped once when it exits, even
+    if it raises an exception. Nested blocks are merged with the outermost
+    one. Meanwhile, this thread does not read the caches pending to be
+    invalidated.
+    """
+    invalidation_batch.depth += 1
+    try:
+        yield
+    finally:
+        invalidation_batch.depth -= 1
+        if not invalidation_batch.depth:
+            pending = invalidation_batch.pending
+            invalidation_batch.pending = OrderedDict()
+            for callback in pending:
+                run_invalidation(callback)
+
+
+class LocalCaches(object):
+    """
+    Keeps the per-process caches of SeoMetadata and SeoRegisteredModel
+    data in sync between processes. Every change bumps a generation number
+    stored in the django cache, and each process clears its local caches
+    when it finds a new one. It is checked at most once every 'interval'
+    seconds, so changes are seen by all the processes within that delay.
+    """
+
+    def __init__(self, alias='default', interval=1.0):
+        self.generation = CacheGeneration('painlessseo:local:generation', alias)
+        self.interval = interval
+        self.callbacks = []
+        self._seen = None
+        self._checked = 0
+
+    def register(self, callback):
+        """
+        Registers a function clearing a local cache.
+        """
+        self.callbacks.append(callback)
+
+    def clear(self):
+        for callback in self.callbacks:
+            callback()
+
+    def check(self):
+        """
+        Clears the local caches if they were invalidated by any process
+        since the last check. Returns whether they were cleared.
+        """
+        if self.interval is None:
+            return False
+        now = time.time()
+        if now - self._checked < self.interval:
+            return False
+        self._checked = now
+
+        generation = self.generation.get()
+        if generation == self._seen:
+            return False
+        # Local caches may have been built before the first check too
+        self._seen = generation
+        self.clear()
+        return True
+
+    def broadcast(self):
+        """
+        Invalidates the local caches of all the processes.
+        """
+        if self.interval is None:
+            return
+        generation = self.generation.bump()
+        if self._seen is not None and generation == self._seen + 1:
+            # Only this process changed it, and its caches are already cleared
+            self._seen = generation
+
+
+class MetadataCache(object):
+    """
+    Two level cache for resolved metadata: a per-process LRU in front of
+    the django cache framework. Keys are built from the path, the language
+    and the content object (if any). Values are the resolved metadata
+    before formatting, so they only depend on SeoMetadata and
+    SeoRegisteredModel data.
+
+    Invalidation bumps a generation number stored in the django cache,
+    so every entry stored in the shared cache becomes unreachable at once.
+    """
+    key_prefix = 'painlessseo'
+
+    def __init__(self, enabled=True, alias='default', timeout=None,
+                 local_size=1000, local_timeout=None):
+        self.enabled = enabled
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LRUCache(max_size=local_size, timeout=local_timeout)
+        self.generation = CacheGeneration('%s:generation' % self.key_prefix, alias)
+
+    @property
+    def backend(self):
+        return get_cache_backend(self.alias)
+
+    def make_key(self, path, lang_code, instance=None):
+        object_key = ''
+        if instance is not None:
+            if not hasattr(instance, '_meta') or instance.pk is None:
+                # Only saved model instances can be part of the key
+                return None
+            ctype = ContentType.objects.get_for_model(instance)
+            object_key = '%s.%s' % (ctype.id, instance.pk)
+        raw_key = '%s|%s|%s' % (smart_str(path), smart_str(lang_code), object_key)
+        return hashlib.md5(raw_key).hexdigest()
+
+    def get(self, path, lang_code, instance=None):
+        if not self.enabled or invalidation_batch.is_pending(self.invalidate):
+            return None
+        key = self.make_key(path, lang_code, instance)
+        if key is None:
+            return None
+
+        value = self.local.get(key)
+        if value is None:
+            value = self.backend.get(
+                '%s:%s:%s' % (self.key_prefix, self.generation.get(), key))
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, path, lang_code, value, instance=None):
+        if not self.enabled or invalidation_batch.is_pending(self.invalidate):
+            return
+        key = self.make_key(path, lang_code, instance)
+        if key is None:
+            return
+
+        self.local.set(key, value)
+        self.backend.set(
+            '%s:%s:%s' % (self.key_prefix, self.generation.get(), key),
+            value, self.timeout)
+
+    def invalidate(self):
+        self.local.clear()
+        if self.enabled:
+            self.generation.bump()
+
+
+class RegisteredMetadataTable(object):
+    """
+    In-memory table with the SeoRegisteredModel titles and descriptions,
+    as lists of (title, description) tuples ordered by 'id' for each
+    (content_type_id, lang_code). The whole table is loaded with a single
+    query and dropped when a SeoRegisteredModel is saved or deleted.
+    """
+
+    def __init__(self):
+        self._table = None
+        self._generation = 0
+
+    def get_table(self):
+        table = self._table
+        if table is None:
+            generation = self._generation
+            table = self.build()
+            if generation == self._generation:
+                # Do not store a table invalidated while being built
+                self._table = table
+        return table
+
+    def build(self):
+        table = {}
+        rows = SeoRegisteredModel.objects.order_by('id').values_list(
+            'content_type_id', 'lang_code', 'title', 'description')
+        for content_type_id, lang_code, title, description in rows:
+            table.setdefault((content_type_id, lang_code), []).append(
+                (title, description))
+        return table
+
+    def get(self, content_type_id, lang_code):
+        return self.get_table().get((content_type_id, lang_code), [])
+
+    def get_content_type_ids(self):
+        return set([
+            content_type_id for content_type_id, lang_code in self.get_table()
+            if content_type_id is not None])
+
+    def invalidate(self):
+        self._generation += 1
+        self._table = None
+
+
+metadata_cache = MetadataCache(
+    enabled=settings.CACHE_ENABLED,
+    alias=settings.CACHE_ALIAS,
+    timeout=settings.CACHE_TIMEOUT,
+    local_size=settings.CACHE_LOCAL_SIZE,
+    local_timeout=settings.CACHE_LOCAL_TIMEOUT)
+
+registered_metadata = RegisteredMetadataTable()
+
+# Keys are (path, lang_code) tuples of paths no SeoMetadata matches
+unmatched_paths = LRUCache(
+    max_size=settings.NEGATIVE_CACHE_SIZE,
+    timeout=settings.NEGATIVE_CACHE_TIMEOUT)
+
+local_caches = LocalCaches(
+    alias=settings.CACHE_ALIAS,
+    interval=settings.CACHE_SYNC_INTERVAL)
+local_caches.register(metadata_cache.local.clear)
+local_caches.register(registered_metadata.invalidate)
+local_caches.register(unmatched_paths.clear)
+
+
+def invalidate_metadata_cache(sender, instance, **kwargs):
+    invalidate_later(metadata_cache.invalidate)
+
+
+for seo_model in (SeoMetadata, SeoRegisteredModel):
+    post_save.connect(
+        invalidate_metadata_cache, sender=seo_model,
+        dispatch_uid='painlessseo_invalidate_cache_save_%s' % seo_model.__name__)
+    post_delete.connect(
+        invalidate_metadata_cache, sender=seo_model,
+        dispatch_uid='painlessseo_invalidate_cache_delete_%s' % seo_model.__name__)
+
+
+def invalidate_registered_metadata(sender, instance, **kwargs):
+    registered_metadata.invalidate()
+
+
+post_save.connect(invalidate_registered_metadata, sender=SeoRegisteredModel,
+                  dispatch_uid='painlessseo_invalidate_registered_save')
+post_delete.connect(invalidate_registered_metadata, sender=SeoRegisteredModel,
+                    dispatch_uid='painlessseo_invalidate_registered_delete')
+
+
+def invalidate_unmatched_paths(sender, instance, **kwargs):
+    if instance.has_parameters:
+        # It may match any path
+        unmatched_paths.clear()
+    else:
+        unmatched_paths.delete((instance.path, instance.lang_code))
+
+
+post_save.connect(invalidate_unmatched_paths, sender=SeoMetadata,
+                  dispatch_uid='painlessseo_invalidate_unmatched_paths')
+
+
+def broadcast_invalidation(sender, instance, **kwargs):
+    invalidate_later(local_caches.broadcast)
+
+
+for seo_model in (SeoMetadata, SeoRegisteredModel):
+    post_save.connect(
+        broadcast_invalidation, sender=seo_model,
+        dispatch_uid='painlessseo_broadcast_save_%s' % seo_model.__name__)
+    post_delete.connect(
+        broadcast_invalidation, sender=seo_model,
+        dispatch_uid='painlessseo_broadcast_delete_%s' % seo_model.__name__)
+
+
+def check_local_caches(sender, **kwargs):
+    local_caches.check()
+
+
+request_started.connect(check_local_caches, dispatch_uid='painlessseo_check_local_caches')
+request_finished.connect(run_uncommitted_invalidations,
+                         dispatch_uid='painlessseo_run_uncommitted_invalidations')
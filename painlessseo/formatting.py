@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import re
+
+from django.utils.encoding import smart_text
+
+from painlessseo import settings
+from painlessseo.cache import LRUCache
+
+PLACEHOLDER_RE = re.compile(r"\{\s*([^\}\s]+)\s*\}")
+
+
+def get_instance_value(instance, name, lang_code):
+    """
+    Resolves a '{name}' placeholder using the instance attributes. Dotted
+    names are followed through foreign keys, related managers are
+    resolved using their get() method and, for every attribute, the one
+    for the language ('name_<lang_code>') is preferred if it exists.
+
+    Returns a (found, value) tuple.
+    """
+    attrs = name.split('.')
+    base = instance
+    attr_value = None
+    for attr in attrs:
+        field_lang = "%s_%s" % (attr, lang_code)
+        if hasattr(base, field_lang):
+            attr_name = field_lang
+        elif hasattr(base, attr):
+            attr_name = attr
+        elif base is None:
+            # In case is a foreign key with 'None' value
+            # We can't go deeper, but we found the attr
+            attr_value = None
+            break
+        else:
+            # Attr not found, so let it like it is
+            return False, None
+
+        attr_value = getattr(base, attr_name)
+        if hasattr(attr_value, 'get'):
+            base = attr_value.get()
+        else:
+            base = attr_value
+
+    return True, attr_value
+
+
+def format_param(value):
+    # Slugs captured from the URL are turned into titles
+    return smart_text(value).replace('-', ' ').title()
+
+
+class CompiledTemplate(object):
+    """
+    A title or description string parsed once into literal and
+    placeholder segments, so it can be rendered in a single pass.
+
+    Placeholders are resolved first from the instance and then from the
+    params; the ones that can not be resolved are left as they are.
+    """
+
+    def __init__(self, string):
+        self.string = string
+        self.segments = []
+        self.names = []
+
+        if not string:
+            return
+
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(string):
+            if match.start() > position:
+                self.segments.append((None, string[position:match.start()]))
+            name = match.group(1)
+            self.segments.append((name, match.group(0)))
+            if name not in self.names:
+                self.names.append(name)
+            position = match.end()
+        if position < len(string):
+            self.segments.append((None, string[position:]))
+
+    def render(self, instance=None, lang_code=None, params=None):
+        if not self.names:
+            return self.string
+
+        values = {}
+        for name in self.names:
+            if instance and lang_code:
+                found, value = get_instance_value(instance, name, lang_code)
+                if found:
+                    values[name] = unicode(value or '')
+                    continue
+            if params and name in params:
+                values[name] = format_param(params[name])
+
+        if not values:
+            return self.string
+
+        return ''.join([values.get(name, text) for name, text in self.segments])
+
+
+compiled_templates = LRUCache(max_size=settings.TEMPLATE_CACHE_SIZE)
+
+
+def compile_template(string):
+    template = compiled_templates.get(string)
+    if template is None:
+        template = CompiledTemplate(string)
+        compiled_templates.set(string, template)
+    return template
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import hashlib
+import uuid
+
+from django.db.models.signals import post_save, post_delete
+from django.utils.encoding import smart_str
+
+from painlessseo import settings
+from painlessseo.cache import (
+    CacheGeneration, get_cache_backend, invalidate_later, invalidation_batch
+    )
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+
+
+class FragmentCache(object):
+    """
+    HTML rendered by the get_seo tag, stored in the django cache by
+    (path, lang_code) and the tag default values, so cached pages are
+    served without resolving the metadata nor rendering the template.
+
+    Entries of the same (path, lang_code) are stored along with a stamp
+    kept in its own key, so deleting it drops all of them at once.
+
+    Any SeoMetadata or SeoRegisteredModel change bumps the generation,
+    dropping all the entries. Entries of registered model instances are
+    deleted when the instances are saved, see utils.expire_seo_fragments.
+    """
+    key_prefix = 'painlessseo:fragments'
+
+    def __init__(self, enabled=False, alias='default', timeout=3600):
+        self.enabled = enabled
+        self.alias = alias
+        self.timeout = timeout
+        self.generation = CacheGeneration('%s:generation' % self.key_prefix, alias)
+
+    @property
+    def backend(self):
+        return get_cache_backend(self.alias)
+
+    def make_key(self, path, lang_code, generation, defaults=None):
+        """
+        Returns the key of an entry, or the one of the stamp of the
+        (path, lang_code) entries if defaults is None.
+        """
+        raw_key = '%s|%s' % (smart_str(path), smart_str(lang_code))
+        if defaults is not None:
+            raw_key = '%s|%s' % (raw_key, smart_str(repr(defaults)))
+        return '%s:%s:%s' % (
+            self.key_prefix, generation, hashlib.md5(raw_key).hexdigest())
+
+    def get(self, path, lang_code, defaults):
+        if not self.enabled or invalidation_batch.is_pending(self.invalidate):
+            return None
+        generation = self.generation.get()
+        stamp_key = self.make_key(path, lang_code, generation)
+        key = self.make_key(path, lang_code, generation, defaults)
+        values = self.backend.get_many([stamp_key, key])
+        stamp = values.get(stamp_key)
+        entry = values.get(key)
+        if stamp is None or entry is None or entry[0] != stamp:
+            return None
+        return entry[1]
+
+    def set(self, path, lang_code, defaults, html):
+        if not self.enabled or invalidation_batch.is_pending(self.invalidate):
+            return
+        generation = self.generation.get()
+        stamp_key = self.make_key(path, lang_code, generation)
+        stamp = self.backend.get(stamp_key)
+        if stamp is None:
+            stamp = uuid.uuid4().hex
+            if not self.backend.add(stamp_key, stamp, self.timeout):
+                # Added by another process meanwhile
+                stamp = self.backend.get(stamp_key)
+                if stamp is None:
+                    return
+        self.backend.set(
+            self.make_key(path, lang_code, generation, defaults),
+            (stamp, html), self.timeout)
+
+    def delete_many(self, keys):
+        """
+        Deletes the entries of a list of (path, lang_code) tuples.
+        """
+        if not self.enabled or not keys:
+            return
+        generation = self.generation.get()
+        self.backend.delete_many([
+            self.make_key(path, lang_code, generation)
+            for path, lang_code in keys])
+
+    def invalidate(self):
+        if self.enabled:
+            self.generation.bump()
+
+
+fragments = FragmentCache(
+    enabled=settings.FRAGMENT_CACHE,
+    alias=settings.CACHE_ALIAS,
+    timeout=settings.FRAGMENT_CACHE_TIMEOUT)
+
+
+def invalidate_fragments(sender, instance, **kwargs):
+    invalidate_later(fragments.invalidate)
+
+
+for seo_model in (SeoMetadata, SeoRegisteredModel):
+    post_save.connect(
+        invalidate_fragments, sender=seo_model,
+        dispatch_uid='painlessseo_invalidate_fragments_save_%s' % seo_model.__name__)
+    post_delete.connect(
+        invalidate_fragments, sender=seo_model,
+        dispatch_uid='painlessseo_invalidate_fragments_delete_%s' % seo_model.__name__)
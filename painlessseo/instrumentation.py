@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import logging
+import threading
+from contextlib import contextmanager
+from timeit import default_timer
+
+from django.db import connection, connections
+from django.dispatch import Signal
+
+from painlessseo import settings
+from painlessseo.cache import get_cache_backend
+
+logger = logging.getLogger('painlessseo')
+
+# Sent after every measured call when SEO_INSTRUMENTATION is enabled
+seo_resolved = Signal(providing_args=[
+    'name', 'path', 'lang_code', 'branch', 'cached',
+    'duration', 'candidates', 'queries'])
+
+MEASURED_NAMES = ('get_path_metadata', 'get_seo')
+BRANCHES = ('exact', 'parameterized', 'registered_model', 'fallback', 'materialized',
+            'prefetched', 'fragment')
+COUNTERS = ('calls', 'time_us', 'queries', 'candidates', 'cached')
+
+
+class Measurement(object):
+    """
+    Data collected while resolving the metadata of a path.
+    """
+
+    def __init__(self, name, path, lang_code):
+        self.name = name
+        self.path = path
+        self.lang_code = lang_code
+        self.branch = None
+        self.cached = False
+        self.duration = 0.0
+        self.candidates = 0
+        self.queries = 0
+
+
+class QueryCounter(object):
+    """
+    Counts the queries run through the connection inside the block,
+    without keeping them nor reading connection.queries. Uses
+    connection.execute_wrapper (django >= 2.0) if available, or wraps the
+    cursors returned by connection.cursor() otherwise.
+    """
+
+    def __init__(self, connection):
+        # The connection itself, not the django.db.connection proxy
+        self.connection = connections[connection.alias]
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper interface
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        if hasattr(self.connection, 'execute_wrapper'):
+            self.wrapper = self.connection.execute_wrapper(self)
+            self.wrapper.__enter__()
+            return self
+
+        self.wrapper = None
+        # Shadow the method with an instance attribute, restored on exit
+        self.previous = self.connection.__dict__.get('cursor')
+        cursor = self.connection.cursor
+
+        def counting_cursor(*args, **kwargs):
+            return CountingCursor(cursor(*args, **kwargs), self)
+        self.connection.cursor = counting_cursor
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.wrapper is not None:
+            return self.wrapper.__exit__(exc_type, exc_value, traceback)
+        if self.previous is None:
+            del self.connection.cursor
+        else:
+            self.connection.cursor = self.previous
+
+
+class CountingCursor(object):
+    """
+    Cursor proxy adding every execute and executemany call to a counter.
+    """
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def execute(self, *args, **kwargs):
+        self.counter.count += 1
+        return self.cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.counter.count += 1
+        return self.cursor.executemany(*args, **kwargs)
+
+
+class Stats(object):
+    """
+    Aggregated counters for the measured calls. They are accumulated in
+    memory and added to the django cache every 'flush_every' calls, so
+    the counters of all the processes can be read from there.
+    """
+    key_prefix = 'painlessseo:stats'
+
+    def __init__(self, alias='default', flush_every=100):
+        self.alias = alias
+        self.flush_every = flush_every
+        self.counters = {}
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return get_cache_backend(self.alias)
+
+    @classmethod
+    def keys(cls):
+        keys = []
+        for name in MEASURED_NAMES:
+            keys.extend(['%s.%s' % (name, counter) for counter in COUNTERS])
+            keys.extend(['%s.branch.%s' % (name, branch) for branch in BRANCHES])
+        return keys
+
+    def add(self, measurement):
+        name = measurement.name
+        values = [
+            ('%s.calls' % name, 1),
+            ('%s.time_us' % name, int(measurement.duration * 1000000)),
+            ('%s.queries' % name, measurement.queries),
+            ('%s.candidates' % name, measurement.candidates),
+            ('%s.cached' % name, int(measurement.cached)),
+            ]
+        if measurement.branch is not None:
+            values.append(('%s.branch.%s' % (name, measurement.branch), 1))
+
+        with self._lock:
+            for key, value in values:
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.pending += 1
+            if self.pending < self.flush_every:
+                return
+            counters = self.counters
+            self.counters = {}
+            self.pending = 0
+        self.flush(counters)
+
+    def flush(self, counters=None):
+        if counters is None:
+            with self._lock:
+                counters = self.counters
+                self.counters = {}
+                self.pending = 0
+
+        backend = self.backend
+        for key, value in counters.iteritems():
+            if not value:
+                continue
+            cache_key = '%s:%s' % (self.key_prefix, key)
+            try:
+                backend.incr(cache_key, value)
+            except ValueError:
+                # First time, unless another process just added it
+                if not backend.add(cache_key, value, None):
+                    backend.incr(cache_key, value)
+
+    def read(self):
+        values = self.backend.get_many(
+            ['%s:%s' % (self.key_prefix, key) for key in self.keys()])
+        return dict(
+            (key, values.get('%s:%s' % (self.key_prefix, key), 0))
+            for key in self.keys())
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.pending = 0
+        self.backend.delete_many(
+            ['%s:%s' % (self.key_prefix, key) for key in self.keys()])
+
+
+stats = Stats(
+    alias=settings.CACHE_ALIAS,
+    flush_every=settings.INSTRUMENTATION_FLUSH)
+
+_local = threading.local()
+
+
+def current_measurement():
+    return getattr(_local, 'measurement', None)
+
+
+def add_candidates(count):
+    measurement = current_measurement()
+    if measurement is not None:
+        measurement.candidates += count
+
+
+def set_branch(branch, cached=False):
+    measurement = current_measurement()
+    if measurement is not None:
+        measurement.branch = branch
+        measurement.cached = cached
+
+
+@contextmanager
+def measure(name, path, lang_code):
+    """
+    Measures the resolution of the metadata of a path inside the block.
+    Does nothing unless SEO_INSTRUMENTATION is enabled.
+    """
+    if not settings.INSTRUMENTATION:
+        yield None
+        return
+
+    parent = current_measurement()
+    measurement = Measurement(name, path, lang_code)
+    _local.measurement = measurement
+    counter = QueryCounter(connection)
+    start = default_timer()
+    try:
+        with counter:
+            yield measurement
+    finally:
+        measurement.duration = default_timer() - start
+        measurement.queries = counter.count
+        _local.measurement = parent
+        if parent is not None:
+            # Inner calls also count for the outer one
+            parent.candidates += measurement.candidates
+            parent.branch = parent.branch or measurement.branch
+            parent.cached = parent.cached or measurement.cached
+        report(measurement)
+
+
+def report(measurement):
+    seo_resolved.send(
+        sender=Measurement,
+        name=measurement.name,
+        path=measurement.path,
+        lang_code=measurement.lang_code,
+        branch=measurement.branch,
+        cached=measurement.cached,
+        duration=measurement.duration,
+        candidates=measurement.candidates,
+        queries=measurement.queries)
+
+    stats.add(measurement)
+
+    slow_ms = settings.INSTRUMENTATION_SLOW_MS
+    if slow_ms is not None and measurement.duration * 1000 >= slow_ms:
+        logger.warning(
+            'Slow SEO resolution: %s(%s, %s) took %.1f ms '
+            '(branch: %s, cached: %s, candidates: %d, queries: %d)',
+            measurement.name, measurement.path, measurement.lang_code,
+            measurement.duration * 1000, measurement.branch, measurement.cached,
+            measurement.candidates, measurement.queries)
@@ -0,0 +1,56 @@
+"""
+export_seo.py
+
+    Streams all the SeoMetadata (or SeoRegisteredModel) rows to a CSV or
+    JSONL file, so they can be edited offline and loaded with import_seo.
+
+"""
+from optparse import make_option
+import sys
+import time
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from painlessseo.transfer import (
+    get_format, iter_metadata_rows, iter_registered_rows, write_rows,
+    METADATA_FIELDS, REGISTERED_FIELDS, DEFAULT_BATCH_SIZE
+    )
+
+
+class Command(NoArgsCommand):
+    option_list = NoArgsCommand.option_list + (
+        make_option('--registered', dest='registered', action='store_true', default=False,
+                    help='Export the SeoRegisteredModel rows instead of SeoMetadata'),
+        make_option('--output', dest='output', default='-',
+                    help='File to write to (default: stdout)'),
+        make_option('--format', dest='format', default=None,
+                    help='csv or jsonl (default: from the output file extension, or csv)'),
+        make_option('--chunk-size', dest='chunk_size', type='int', default=DEFAULT_BATCH_SIZE,
+                    help='Number of rows loaded at once'),
+    )
+    help = '''Export the SEO metadata as CSV or JSONL. '''
+
+    def handle_noargs(self, **options):
+        output = options.get('output')
+        try:
+            format = get_format(output, options.get('format'))
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options.get('registered'):
+            rows = iter_registered_rows(options.get('chunk_size'))
+            fields = REGISTERED_FIELDS
+        else:
+            rows = iter_metadata_rows(options.get('chunk_size'))
+            fields = METADATA_FIELDS
+
+        start = time.time()
+        if output == '-':
+            count = write_rows(sys.stdout, rows, fields, format)
+        else:
+            with open(output, 'wb') as stream:
+                count = write_rows(stream, rows, fields, format)
+        elapsed = max(time.time() - start, 0.001)
+
+        # Keep stdout for the exported rows
+        sys.stderr.write("%d rows exported (%.1f rows/s)\n" % (count, count / elapsed))
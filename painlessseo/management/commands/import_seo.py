@@ -0,0 +1,67 @@
+"""
+import_seo.py
+
+    Loads SeoMetadata (or SeoRegisteredModel) rows from a CSV or JSONL
+    file, as written by export_seo, creating or updating them in batches.
+
+"""
+from optparse import make_option
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.transfer import get_format, read_rows, import_rows, DEFAULT_BATCH_SIZE
+
+PROGRESS_EVERY = 100000
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--registered', dest='registered', action='store_true', default=False,
+                    help='Import SeoRegisteredModel rows instead of SeoMetadata'),
+        make_option('--format', dest='format', default=None,
+                    help='csv or jsonl (default: from the file extension, or csv)'),
+        make_option('--batch-size', dest='batch_size', type='int', default=DEFAULT_BATCH_SIZE,
+                    help='Number of rows written in each transaction'),
+    )
+    args = '<file>'
+    help = '''Import SEO metadata from a CSV or JSONL file ('-' for stdin). '''
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Usage: import_seo %s" % self.args)
+        filename = args[0]
+        try:
+            format = get_format(filename, options.get('format'))
+        except ValueError as e:
+            raise CommandError(e)
+
+        model_class = SeoRegisteredModel if options.get('registered') else SeoMetadata
+        start = time.time()
+        progress = {'next': PROGRESS_EVERY}
+
+        def on_error(line_number, message):
+            print("   - Line %d skipped: %s") % (line_number, message)
+
+        def on_batch(result):
+            if result['rows'] >= progress['next']:
+                progress['next'] += PROGRESS_EVERY
+                elapsed = max(time.time() - start, 0.001)
+                print("%d rows read (%.1f rows/s)") % (result['rows'], result['rows'] / elapsed)
+
+        if filename == '-':
+            result = import_rows(
+                model_class, read_rows(sys.stdin, format), options.get('batch_size'),
+                on_error=on_error, on_batch=on_batch)
+        else:
+            with open(filename, 'rb') as stream:
+                result = import_rows(
+                    model_class, read_rows(stream, format), options.get('batch_size'),
+                    on_error=on_error, on_batch=on_batch)
+
+        elapsed = max(time.time() - start, 0.001)
+        print("%d rows imported: %d created, %d updated, %d skipped (%.1f rows/s)") % (
+            result['rows'], result['created'], result['updated'], result['errors'],
+            result['rows'] / elapsed)
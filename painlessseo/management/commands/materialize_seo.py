@@ -0,0 +1,63 @@
+"""
+materialize_seo.py
+
+    Stores the final metadata of all the registered model instances in
+    the materialized metadata table, so it is served without resolving it.
+
+"""
+from optparse import make_option
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import NoArgsCommand, CommandError
+
+from painlessseo import settings
+from painlessseo.materialized import materialized
+from painlessseo.utils import materialize_seo
+from painlessseo.management.commands.sync_seo_models import (
+    iter_chunks, DEFAULT_CHUNK_SIZE
+    )
+import time
+
+DEFAULT_SEO_MODELS = settings.SEO_MODELS
+
+
+class Command(NoArgsCommand):
+    option_list = NoArgsCommand.option_list + (
+        make_option('--models', dest='seo_models', default=DEFAULT_SEO_MODELS,
+                    help='Use this to indicate which apps must be materialized'),
+        make_option('--chunk-size', dest='chunk_size', type='int', default=DEFAULT_CHUNK_SIZE,
+                    help='Number of instances loaded at once'),
+        make_option('--clear', dest='clear', action='store_true', default=False,
+                    help='Drop all the materialized metadata before starting'),
+    )
+    help = '''Materialize the SEO metadata of the registered model instances. '''
+    requires_model_validation = True
+
+    def handle_noargs(self, **options):
+        if not materialized.enabled:
+            raise CommandError("SEO_MATERIALIZED setting is not enabled.")
+
+        seo_models = options.get('seo_models')
+        if isinstance(seo_models, str):
+            models = seo_models.split(' ')
+            seo_models = []
+            for model in models:
+                seo_models.append(model.split('.'))
+
+        if options.get('clear'):
+            materialized.invalidate()
+            print("Materialized metadata cleared")
+
+        for app, model in seo_models:
+            ctype = ContentType.objects.get(app_label=app.lower(), model=model.lower())
+            model_class = ctype.model_class()
+
+            print("Materializing %s instances in app %s") % (model, app)
+            start = time.time()
+            count = entries = 0
+            for chunk in iter_chunks(model_class.objects.all(), options.get('chunk_size')):
+                entries += materialize_seo(chunk)
+                count += len(chunk)
+            elapsed = max(time.time() - start, 0.001)
+            print("%d %s materialized on app %s: %d entries (%.1f instances/s)") % (
+                count, model, app, entries, count / elapsed)
@@ -0,0 +1,47 @@
+"""
+seo_stats.py
+
+    Shows the aggregated timing and query counters collected for the SEO
+    resolution when SEO_INSTRUMENTATION is enabled.
+
+"""
+from optparse import make_option
+import json
+
+from django.core.management.base import NoArgsCommand
+
+from painlessseo import settings
+from painlessseo.instrumentation import stats, MEASURED_NAMES, BRANCHES
+
+
+class Command(NoArgsCommand):
+    option_list = NoArgsCommand.option_list + (
+        make_option('--json', dest='json', action='store_true', default=False,
+                    help='Output the raw counters as JSON'),
+        make_option('--reset', dest='reset', action='store_true', default=False,
+                    help='Reset the counters after showing them'),
+    )
+    help = '''Show the SEO resolution counters collected by SEO_INSTRUMENTATION.'''
+
+    def handle_noargs(self, **options):
+        if not settings.INSTRUMENTATION:
+            print("Warning: SEO_INSTRUMENTATION is not enabled, counters are not being updated.")
+
+        counters = stats.read()
+        if options.get('json'):
+            print(json.dumps(counters, indent=2, sort_keys=True))
+        else:
+            for name in MEASURED_NAMES:
+                calls = counters['%s.calls' % name]
+                print("%s: %d calls") % (name, calls)
+                if not calls:
+                    continue
+                print("   - avg time: %.1f us") % (float(counters['%s.time_us' % name]) / calls)
+                print("   - avg queries: %.2f") % (float(counters['%s.queries' % name]) / calls)
+                print("   - avg candidates: %.2f") % (float(counters['%s.candidates' % name]) / calls)
+                print("   - cached: %.1f%%") % (100.0 * counters['%s.cached' % name] / calls)
+                for branch in BRANCHES:
+                    print("   - %s: %d") % (branch, counters['%s.branch.%s' % (name, branch)])
+
+        if options.get('reset'):
+            stats.reset()
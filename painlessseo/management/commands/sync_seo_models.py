@@ -6,19 +6,28 @@ sync_seo_models.py
 """
 from optparse import make_option
 
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import NoArgsCommand, CommandError
-from django.core.urlresolvers import resolve, Resolver404
 from django.contrib.contenttypes.models import ContentType
+from django.db import connections, models
+from django.db.models import Max, Min
 
 from painlessseo import settings
-from painlessseo.utils import (
-    delete_seo, update_seo, get_fallback_metadata
-    )
+from painlessseo.cache import batch_invalidations, caches
+from painlessseo.utils import update_seo, bulk_update_seo, get_absolute_urls
 from painlessseo.models import SeoRegisteredModel
-import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
 
 DEFAULT_CREATE_LANG = []
 DEFAULT_SEO_MODELS = settings.SEO_MODELS
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_WORKERS = 1
+DEFAULT_RANGE_SIZE = 10000
+DEFAULT_CHECKPOINT = 'sync_seo_models.checkpoint.json'
 
 
 class Command(NoArgsCommand):
@@ -29,6 +38,18 @@ class Command(NoArgsCommand):
                     help='Use this to indicate which apps must be updated'),
         make_option('--sync-instances', dest='sync_instances', default=False,
                     help='Use this to indicate if instances must be synced'),
+        make_option('--bulk', dest='bulk', action='store_true', default=False,
+                    help='Sync instances in chunks using bulk queries'),
+        make_option('--chunk-size', dest='chunk_size', type='int', default=DEFAULT_CHUNK_SIZE,
+                    help='Number of instances loaded at once when using --bulk'),
+        make_option('--workers', dest='workers', type='int', default=DEFAULT_WORKERS,
+                    help='Number of processes used to sync instances when using --bulk'),
+        make_option('--range-size', dest='range_size', type='int', default=DEFAULT_RANGE_SIZE,
+                    help='Number of pks synced by each task when using --bulk'),
+        make_option('--checkpoint', dest='checkpoint', default=DEFAULT_CHECKPOINT,
+                    help='File keeping the pk ranges already synced when using --bulk'),
+        make_option('--resume', dest='resume', action='store_true', default=False,
+                    help='Skip the pk ranges synced by a previous interrupted --bulk run'),
 
     )
     help = '''DEBUG only: Sync the SEO info in the database for registered models. '''
@@ -50,6 +71,10 @@ class Command(NoArgsCommand):
                 update_langs.append(lang)
         languages = settings.SEO_LANGUAGES
 
+        if options.get('resume') and not options.get('bulk'):
+            raise CommandError("--resume can only be used with --bulk.")
+
+        bulk_models = []
         for app, model in seo_models:
             ctype = ContentType.objects.get(app_label=app.lower(), model=model.lower())
             if not hasattr(ctype.model_class(), 'get_absolute_url'):
@@ -74,14 +99,269 @@ class Command(NoArgsCommand):
                     if created:
                         print("   - Lang '%s' updated.") % (lang_code)
 
-            if options.get('sync_instances'):
+            if options.get('sync_instances') and options.get('bulk'):
+                bulk_models.append((app, model))
+
+            elif options.get('sync_instances'):
                 print("Updating %s instances in app %s") % (model, app)
                 objs = list(model_class.objects.all())
-                for obj in objs:
-                    update_seo(model_class, obj, auto_languages=update_langs, weak=True)
+                # All the paths of each language are computed at once
+                absolute_urls = get_absolute_urls(objs)
+                # Shared caches are invalidated once, not for every instance
+                with batch_invalidations():
+                    for obj in objs:
+                        update_seo(model_class, obj, auto_languages=update_langs,
+                                   absolute_urls=absolute_urls, weak=True)
                 count = model_class.objects.count()
                 print("%d %s updated on app %s") % (count, model, app)
 
+        if bulk_models:
+            self.sync_bulk(bulk_models, update_langs, options)
+
+    def sync_bulk(self, bulk_models, update_langs, options):
+        checkpoint = SyncCheckpoint(
+            options.get('checkpoint'), options.get('range_size'), update_langs)
+        if options.get('resume'):
+            checkpoint.load()
+        else:
+            checkpoint.clear()
+
+        workers = options.get('workers')
+        print("Updating %s instances (bulk, %d workers)") % (
+            ', '.join(['%s.%s' % (app, model) for app, model in bulk_models]), workers)
+        start = time.time()
+        totals = {}
+        worker_stats = {}
+        for result in sync_instances_parallel(
+                bulk_models, update_langs, checkpoint,
+                chunk_size=options.get('chunk_size'), workers=workers):
+            key = (result['app'], result['model'])
+            total = totals.setdefault(key, {'count': 0, 'created': 0, 'updated': 0})
+            for name in total:
+                total[name] += result[name]
+            stats = worker_stats.setdefault(result['worker'], {'count': 0, 'seconds': 0.0})
+            stats['count'] += result['count']
+            stats['seconds'] += result['seconds']
+        elapsed = max(time.time() - start, 0.001)
+
+        for app, model in bulk_models:
+            total = totals.get((app, model), {'count': 0, 'created': 0, 'updated': 0})
+            print("%d %s synced on app %s: %d created, %d updated") % (
+                total['count'], model, app, total['created'], total['updated'])
+        for worker, stats in sorted(worker_stats.items()):
+            print("   - Worker %s: %d instances (%.1f instances/s)") % (
+                worker, stats['count'], stats['count'] / max(stats['seconds'], 0.001))
+        count = sum([model_total['count'] for model_total in totals.values()])
+        print("%d instances synced in %.1fs (%.1f instances/s)") % (count, elapsed, count / elapsed)
+
+        # Finished, so a new run must start over
+        checkpoint.clear()
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Yields lists of at most chunk_size instances ordered by pk, without
+    loading the whole queryset in memory. Each chunk starts after the last
+    pk of the previous one (no offsets), so it works with any primary key
+    type the database can order, integer or not.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk_queryset = queryset
+        if last_pk is not None:
+            chunk_queryset = queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk_queryset[:chunk_size].iterator())
+        if not chunk:
+            break
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def sync_instances_range(app, model, update_langs, pk_from=None, pk_to=None,
+                         chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Syncs the SeoMetadata of the instances with pk_from <= pk <= pk_to.
+    Returns a (created, updated, count) tuple.
+    """
+    ctype = ContentType.objects.get(app_label=app.lower(), model=model.lower())
+    model_class = ctype.model_class()
+    queryset = model_class.objects.all()
+    if pk_from is not None:
+        queryset = queryset.filter(pk__gte=pk_from)
+    if pk_to is not None:
+        queryset = queryset.filter(pk__lte=pk_to)
+
+    created = updated = count = 0
+    with batch_invalidations():
+        for chunk in iter_chunks(queryset, chunk_size):
+            chunk_created, chunk_updated = bulk_update_seo(
+                model_class, chunk, auto_languages=update_langs)
+            created += chunk_created
+            updated += chunk_updated
+            count += len(chunk)
+    return created, updated, count
+
+
+def _sync_instances_range(args):
+    # multiprocessing.Pool only passes one argument
+    app, model, update_langs, pk_from, pk_to, chunk_size = args
+    start = time.time()
+    created, updated, count = sync_instances_range(*args)
+    return {
+        'app': app,
+        'model': model,
+        'pk_from': pk_from,
+        'created': created,
+        'updated': updated,
+        'count': count,
+        'seconds': time.time() - start,
+        'worker': os.getpid(),
+        }
+
+
+def has_integer_pk(model_class):
+    pk_field = model_class._meta.pk
+    while pk_field.rel is not None:
+        # One to one primary keys, e.g. multi-table inheritance
+        pk_field = pk_field.rel.get_related_field()
+    return isinstance(pk_field, (models.AutoField, models.IntegerField))
+
+
+def get_pk_ranges(app, model, range_size):
+    """
+    Returns the (pk_from, pk_to) ranges covering all the instances of the
+    model. Ranges are aligned to multiples of range_size, so they are the
+    same between runs even if instances were added or deleted.
+
+    Models without an integer primary key can not be split, so they get
+    a single (None, None) range with all the instances.
+    """
+    ctype = ContentType.objects.get(app_label=app.lower(), model=model.lower())
+    model_class = ctype.model_class()
+    if not has_integer_pk(model_class):
+        if not model_class.objects.exists():
+            return []
+        return [(None, None)]
+
+    bounds = model_class.objects.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+    if bounds['min_pk'] is None:
+        return []
+
+    ranges = []
+    pk_from = bounds['min_pk'] // range_size * range_size
+    while pk_from <= bounds['max_pk']:
+        ranges.append((pk_from, pk_from + range_size - 1))
+        pk_from += range_size
+    return ranges
+
+
+class SyncCheckpoint(object):
+    """
+    The pk ranges of each model already synced, stored as JSON in a local
+    file every time one is finished, so an interrupted run can resume.
+    Ranges are kept by model and languages created (--langs), as a run
+    with other languages must sync them again.
+    """
+
+    def __init__(self, filename, range_size=DEFAULT_RANGE_SIZE, update_langs=()):
+        self.filename = filename
+        self.range_size = range_size
+        self.update_langs = sorted(update_langs)
+        self.done = {}
+
+    def make_key(self, app, model):
+        return '%s.%s:%s' % (app, model, ','.join(self.update_langs))
+
+    def load(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename) as checkpoint_file:
+            data = json.load(checkpoint_file)
+        if data['range_size'] != self.range_size:
+            raise CommandError(
+                "Checkpoint %s was created with --range-size=%d." % (
+                    self.filename, data['range_size']))
+        self.done = dict(
+            (model_key, set(pks)) for model_key, pks in data['done'].iteritems())
+
+    def is_done(self, app, model, pk_from):
+        return pk_from in self.done.get(self.make_key(app, model), ())
+
+    def mark_done(self, app, model, pk_from):
+        self.done.setdefault(self.make_key(app, model), set()).add(pk_from)
+        data = {
+            'range_size': self.range_size,
+            'done': dict(
+                (model_key, sorted(pks)) for model_key, pks in self.done.iteritems()),
+            }
+        # Replace the file at once, so it is never left half written
+        temp_filename = '%s.tmp' % self.filename
+        with open(temp_filename, 'w') as checkpoint_file:
+            json.dump(data, checkpoint_file)
+        os.rename(temp_filename, self.filename)
+
+    def clear(self):
+        self.done = {}
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+def close_connections():
+    """
+    Closes the database and cache connections, so the worker processes
+    forked afterwards open their own instead of sharing the sockets.
+    """
+    for conn in connections.all():
+        conn.close()
+    if caches is not None:
+        backends = caches.all()
+    else:
+        from django.core.cache import cache
+        backends = [cache]
+    for backend in backends:
+        backend.close()
+
+
+def sync_instances_parallel(seo_models, update_langs, checkpoint,
+                            chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Syncs the SeoMetadata of all the instances of the given models,
+    splitting their pk ranges between the given number of worker
+    processes. Ranges in the checkpoint are skipped, and the ones finished
+    are added to it. Yields the result of every range as it finishes.
+    """
+    tasks = []
+    for app, model in seo_models:
+        for pk_from, pk_to in get_pk_ranges(app, model, checkpoint.range_size):
+            if not checkpoint.is_done(app, model, pk_from):
+                tasks.append((app, model, update_langs, pk_from, pk_to, chunk_size))
+
+    if workers <= 1:
+        results = itertools.imap(_sync_instances_range, tasks)
+        pool = None
+    else:
+        # Each process must open its own connections
+        close_connections()
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(_sync_instances_range, tasks)
+
+    finished = False
+    try:
+        for result in results:
+            checkpoint.mark_done(result['app'], result['model'], result['pk_from'])
+            yield result
+        finished = True
+    finally:
+        if pool is not None:
+            if finished:
+                pool.close()
+            else:
+                # Interrupted: do not wait for the queued ranges, the
+                # checkpoint only has the finished ones
+                pool.terminate()
+            pool.join()
+
 
 def get_hardcoded_metadata(cls, lang_code):
     result = {}
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+
+from painlessseo import settings
+from painlessseo.cache import local_caches
+from painlessseo.instrumentation import add_candidates
+from painlessseo.models import SeoMetadata
+from painlessseo.paths import (
+    PARAMETER_RE, compile_path, literal_prefix, candidate_prefixes,
+    count_segments, get_path_segments
+    )
+
+
+# SeoMetadata columns loaded into MetadataRecord and PathPattern
+RECORD_FIELDS = ('id', 'path', 'title', 'description', 'content_type_id', 'object_id')
+
+_record_queryset = None
+
+
+def get_record_queryset():
+    """
+    Returns a SeoMetadata values_list queryset of RECORD_FIELDS ordered by
+    id. It is set up once, as filtering it is cheaper than building it.
+    """
+    global _record_queryset
+    if _record_queryset is None:
+        _record_queryset = SeoMetadata.objects.values_list(*RECORD_FIELDS).order_by('id')
+    return _record_queryset
+
+
+class MetadataRecord(object):
+    """
+    Compact in-memory record of a SeoMetadata, with only the fields needed
+    to resolve it, built from a values_list row. Can be used instead of
+    the SeoMetadata instance when resolving the metadata.
+    """
+    __slots__ = RECORD_FIELDS
+    has_parameters = False
+
+    def __init__(self, id, path, title, description, content_type_id, object_id):
+        self.id = id
+        self.path = path
+        self.title = title
+        self.description = description
+        self.content_type_id = content_type_id
+        self.object_id = object_id
+
+    def get_metadata(self):
+        result = {}
+        for item in settings.SEO_FIELDS:
+            result[item] = getattr(self, item)
+        return result
+
+
+class PathPattern(MetadataRecord):
+    """
+    MetadataRecord of a parameterized SeoMetadata, with its compiled path.
+    """
+    __slots__ = ('prefix', 'regex')
+    has_parameters = True
+
+    def __init__(self, id, path, title, description, content_type_id, object_id,
+                 regex=None):
+        super(PathPattern, self).__init__(
+            id, path, title, description, content_type_id, object_id)
+        self.prefix = literal_prefix(path)
+        self.regex = regex or compile_path(path)
+
+
+def get_bucket_key(path, segments):
+    """
+    Returns the (number of segments, first segment) bucket of a path. The
+    first segment is None for parameterized paths starting with a
+    parameter, as they may match any first segment.
+    """
+    for segment in path.split('/'):
+        if segment:
+            if PARAMETER_RE.search(segment):
+                return (segments, None)
+            return (segments, segment)
+    return (segments, None)
+
+
+class PathPatternIndex(object):
+    """
+    Per-language index of compiled parameterized SeoMetadata paths.
+
+    Patterns are compiled once per language and kept in memory until a
+    SeoMetadata instance is saved or deleted. They are bucketed by number
+    of segments and first literal segment, so a lookup only tests the
+    patterns that may match the path; the ones whose number of segments
+    can not be known (having regex special chars) are always tested.
+    Matches are returned in 'id' order, so they are the same (and in the
+    same order) as testing every parameterized row one by one.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._patterns = {}
+        self._generation = 0
+
+    def get_patterns(self, lang_code):
+        """
+        Returns a (buckets, irregular) tuple: a dict of PathPattern lists
+        by bucket key and a list of the patterns not in any bucket.
+        """
+        patterns = self._patterns.get(lang_code)
+        if patterns is None:
+            generation = self._generation
+            patterns = self.build(lang_code)
+            if generation == self._generation:
+                # Do not store an index invalidated while being built
+                self._patterns[lang_code] = patterns
+        return patterns
+
+    def build(self, lang_code):
+        buckets = {}
+        irregular = []
+        rows = get_record_queryset().filter(lang_code=lang_code, has_parameters=True)
+        for row in rows:
+            pattern = PathPattern(*row)
+            segments = get_path_segments(pattern.path)
+            if segments is None:
+                irregular.append(pattern)
+            else:
+                buckets.setdefault(get_bucket_key(pattern.path, segments), []).append(pattern)
+        return buckets, irregular
+
+    def get_candidates(self, path, lang_code):
+        buckets, irregular = self.get_patterns(lang_code)
+        segments = count_segments(path)
+        key = get_bucket_key(path, segments)
+        candidates = []
+        for candidate_key in (key, (segments, None)):
+            candidates.extend(buckets.get(candidate_key, ()))
+        candidates.extend(irregular)
+        return candidates
+
+    def match(self, path, lang_code):
+        """
+        Returns a list of (pattern, groups) tuples for every
+        parameterized path of the language matching the given path.
+        """
+        if not self.enabled:
+            return self.match_in_database(path, lang_code)
+
+        matches = []
+        evaluated = 0
+        for pattern in self.get_candidates(path, lang_code):
+            if path.startswith(pattern.prefix):
+                evaluated += 1
+                match = pattern.regex.match(path)
+                if match:
+                    matches.append((pattern, match.groups()))
+        add_candidates(evaluated)
+        # Candidates come from several buckets
+        matches.sort(key=lambda match: match[0].id)
+        return matches
+
+    def match_in_database(self, path, lang_code):
+        """
+        Same as match, but without keeping anything in memory. Candidates
+        are narrowed in the database using the precomputed path prefix and
+        number of segments of each parameterized path.
+        """
+        matches = []
+        rows = get_record_queryset().filter(
+            Q(path_segments=count_segments(path)) | Q(path_segments__isnull=True),
+            lang_code=lang_code, has_parameters=True,
+            path_prefix__in=candidate_prefixes(path))
+        evaluated = 0
+        for row in rows:
+            evaluated += 1
+            regex = compile_path(row[1])
+            match = regex.match(path)
+            if match:
+                matches.append((PathPattern(*row, regex=regex), match.groups()))
+        add_candidates(evaluated)
+        return matches
+
+    def invalidate(self, lang_code=None):
+        self._generation += 1
+        if lang_code is None:
+            self._patterns = {}
+        else:
+            self._patterns.pop(lang_code, None)
+
+
+path_index = PathPatternIndex(enabled=settings.PATH_INDEX)
+local_caches.register(path_index.invalidate)
+
+
+def invalidate_path_index(sender, instance, **kwargs):
+    # The language may have changed, so drop every language index
+    path_index.invalidate()
+
+
+post_save.connect(invalidate_path_index, sender=SeoMetadata,
+                  dispatch_uid='painlessseo_invalidate_path_index_save')
+post_delete.connect(invalidate_path_index, sender=SeoMetadata,
+                    dispatch_uid='painlessseo_invalidate_path_index_delete')
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import hashlib
+
+from django.db.models.signals import post_save, post_delete
+from django.utils.encoding import smart_str
+
+from painlessseo import settings
+from painlessseo.cache import CacheGeneration, get_cache_backend
+from painlessseo.models import SeoRegisteredModel
+
+
+class MaterializedMetadata(object):
+    """
+    Final (already formatted) metadata of the registered model instances,
+    stored in the django cache by (path, lang_code), so the get_seo tag
+    can serve them with a single key lookup.
+
+    Entries are written by the materialize_seo command and refreshed when
+    the instances or their SeoMetadata are saved, see utils.materialize_seo.
+    Changes that may affect any instance (SeoRegisteredModel or
+    parameterized SeoMetadata) bump the generation, dropping all of them.
+    Values of related objects ('{author.username}') are only refreshed
+    when the instance is saved, or when the entry expires.
+    """
+    key_prefix = 'painlessseo:materialized'
+
+    def __init__(self, enabled=False, alias='default', timeout=86400):
+        self.enabled = enabled
+        self.alias = alias
+        self.timeout = timeout
+        self.generation = CacheGeneration('%s:generation' % self.key_prefix, alias)
+
+    @property
+    def backend(self):
+        return get_cache_backend(self.alias)
+
+    def make_key(self, path, lang_code, generation):
+        raw_key = '%s|%s' % (smart_str(path), smart_str(lang_code))
+        return '%s:%s:%s' % (
+            self.key_prefix, generation, hashlib.md5(raw_key).hexdigest())
+
+    def get(self, path, lang_code):
+        if not self.enabled:
+            return None
+        return self.backend.get(
+            self.make_key(path, lang_code, self.generation.get()))
+
+    def set_many(self, entries):
+        """
+        Stores a dict of metadata by (path, lang_code).
+        """
+        if not self.enabled or not entries:
+            return
+        generation = self.generation.get()
+        self.backend.set_many(dict(
+            (self.make_key(path, lang_code, generation), metadata)
+            for (path, lang_code), metadata in entries.iteritems()), self.timeout)
+
+    def delete_many(self, keys):
+        """
+        Deletes a list of (path, lang_code) entries.
+        """
+        if not self.enabled or not keys:
+            return
+        generation = self.generation.get()
+        self.backend.delete_many([
+            self.make_key(path, lang_code, generation)
+            for path, lang_code in keys])
+
+    def invalidate(self):
+        if self.enabled:
+            self.generation.bump()
+
+
+materialized = MaterializedMetadata(
+    enabled=settings.MATERIALIZED,
+    alias=settings.CACHE_ALIAS,
+    timeout=settings.MATERIALIZED_TIMEOUT)
+
+
+def invalidate_materialized(sender, instance, **kwargs):
+    materialized.invalidate()
+
+
+post_save.connect(invalidate_materialized, sender=SeoRegisteredModel,
+                  dispatch_uid='painlessseo_invalidate_materialized_save')
+post_delete.connect(invalidate_materialized, sender=SeoRegisteredModel,
+                    dispatch_uid='painlessseo_invalidate_materialized_delete')
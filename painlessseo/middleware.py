@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.utils.translation import get_language
+
+from painlessseo import settings
+from painlessseo.utils import get_path_metadata_async
+
+REQUEST_LOOKUP_ATTR = '_painlessseo_lookup'
+
+
+def prefetch_seo(view_func):
+    """
+    Marks a view whose SEO metadata SeoLookupMiddleware looks up
+    concurrently with it.
+    """
+    view_func.seo_prefetch = True
+    return view_func
+
+
+def should_prefetch(request, view_func):
+    if getattr(view_func, 'seo_prefetch', False):
+        return True
+    # Class based views, on django >= 1.9
+    view_class = getattr(view_func, 'view_class', None)
+    if getattr(view_class, 'seo_prefetch', False):
+        return True
+    return request.path.startswith(tuple(settings.LOOKUP_PATHS))
+
+
+class SeoLookupMiddleware(object):
+    """
+    Starts looking up the SEO metadata of the request path before the
+    view runs, so it runs concurrently with the view. The seo template
+    tags use the result when it does not depend on the view.
+
+    Each lookup uses a thread and a database connection of its own, so it
+    is only done for the views marked with prefetch_seo (or having a
+    'seo_prefetch' attribute) and the paths starting with any of the
+    SEO_LOOKUP_PATHS prefixes.
+
+    Must be placed after LocaleMiddleware, so the language is known.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if not should_prefetch(request, view_func):
+            return None
+        setattr(request, REQUEST_LOOKUP_ATTR, get_path_metadata_async(
+            request.path, get_language()[:2]))
+        return None
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from painlessseo import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeoMetadata',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('object_id', models.PositiveIntegerField(null=True, verbose_name='Id', blank=True)),
+                ('lang_code', models.CharField(default=settings.DEFAULT_LANG_CODE, max_length=2, verbose_name='Language', choices=settings.SEO_LANGUAGES)),
+                ('has_parameters', models.BooleanField(default=False, help_text='This indicates if the SEOMetadata path contains parameters.')),
+                ('path', models.CharField(help_text="This should be an absolute path, excluding the domain name. Example: '/foo/bar/'. You can also capture parameters using '{X}' notation, where X is a positive number.", max_length=200, null=True, verbose_name='Path', db_index=True)),
+                ('title', models.CharField(help_text="Here you can make use of the parameters captured in the URL using the same '{X}' notation.", max_length=100, null=True, verbose_name='Title')),
+                ('description', models.CharField(help_text="Here you can make use of the parameters captured in the URL using the same '{X}' notation.", max_length=200, null=True, verbose_name='Description')),
+                ('content_type', models.ForeignKey(verbose_name='Model', blank=True, to='contenttypes.ContentType', null=True)),
+            ],
+            options={
+                'ordering': ('path', 'lang_code'),
+                'verbose_name': 'SEO Path Metadata',
+                'verbose_name_plural': 'SEO Path Metadata',
+            },
+        ),
+        migrations.CreateModel(
+            name='SeoRegisteredModel',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('lang_code', models.CharField(default=settings.DEFAULT_LANG_CODE, max_length=2, verbose_name='Language', choices=settings.SEO_LANGUAGES)),
+                ('title', models.CharField(max_length=100, null=True, verbose_name='Title', blank=True)),
+                ('description', models.CharField(max_length=200, null=True, verbose_name='Description', blank=True)),
+                ('content_type', models.ForeignKey(blank=True, to='contenttypes.ContentType', null=True)),
+            ],
+            options={
+                'verbose_name': 'SEO Model',
+                'verbose_name_plural': 'SEO Models',
+            },
+        ),
+    ]
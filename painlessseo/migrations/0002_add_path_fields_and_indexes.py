@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('painlessseo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seometadata',
+            name='path_prefix',
+            field=models.CharField(default='', max_length=200, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='seometadata',
+            name='path_segments',
+            field=models.PositiveSmallIntegerField(null=True, editable=False, blank=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='seometadata',
+            index_together=set([('lang_code', 'has_parameters', 'path_prefix'), ('content_type', 'object_id', 'lang_code'), ('lang_code', 'has_parameters', 'id'), ('path', 'lang_code')]),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from painlessseo.paths import get_path_prefix, get_path_segments
+
+BATCH_SIZE = 1000
+
+
+def populate_path_fields(apps, schema_editor):
+    """
+    Precomputes path_prefix and path_segments for existing SeoMetadata,
+    with one UPDATE per batch and distinct (prefix, segments) values.
+    """
+    SeoMetadata = apps.get_model('painlessseo', 'SeoMetadata')
+    queryset = SeoMetadata.objects.using(schema_editor.connection.alias).order_by('id')
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list('id', 'path')[:BATCH_SIZE])
+        if not rows:
+            break
+        groups = {}
+        for sm_id, path in rows:
+            key = (get_path_prefix(path or ''), get_path_segments(path or ''))
+            groups.setdefault(key, []).append(sm_id)
+        for (path_prefix, path_segments), ids in groups.items():
+            queryset.filter(id__in=ids).update(
+                path_prefix=path_prefix, path_segments=path_segments)
+        last_id = rows[-1][0]
+
+
+def unpopulate_path_fields(apps, schema_editor):
+    # Nothing to do, the columns are dropped by the previous migration
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('painlessseo', '0002_add_path_fields_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_path_fields, unpopulate_path_fields),
+    ]
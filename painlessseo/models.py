@@ -10,6 +10,7 @@ from django.db.models.signals import pre_save
 
 
 from painlessseo import settings
+from painlessseo.paths import get_path_prefix, get_path_segments
 
 
 class SeoRegisteredModel(models.Model):
@@ -42,6 +43,10 @@ class SeoMetadata(models.Model):
                             null=True, blank=False,
                             help_text=_("This should be an absolute path, excluding the domain name. Example: '/foo/bar/'. You can also capture parameters using '{X}' notation, where X is a positive number."))
 
+    # Precomputed from path, used to narrow the parameterized path lookups
+    path_prefix = models.CharField(max_length=200, blank=True, default='', editable=False)
+    path_segments = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+
     # SEO Info
     title = models.CharField(
         verbose_name=_('Title'), max_length=100, blank=False, null=True,
@@ -54,10 +59,29 @@ class SeoMetadata(models.Model):
         verbose_name = _('SEO Path Metadata')
         verbose_name_plural = _('SEO Path Metadata')
         ordering = ('path', 'lang_code')
+        index_together = [
+            ('path', 'lang_code'),
+            ('lang_code', 'has_parameters', 'id'),
+            ('lang_code', 'has_parameters', 'path_prefix'),
+            ('content_type', 'object_id', 'lang_code'),
+        ]
 
     def __unicode__(self):
         return "Language: %s | URL: %s" % (self.lang_code, self.path)
 
+    def save(self, *args, **kwargs):
+        self.update_path_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'path' in update_fields:
+            # Precomputed fields must be saved along with the path
+            kwargs['update_fields'] = list(set(update_fields) | set(['path_prefix', 'path_segments']))
+        super(SeoMetadata, self).save(*args, **kwargs)
+
+    def update_path_fields(self):
+        path = self.path or ''
+        self.path_prefix = get_path_prefix(path)
+        self.path_segments = get_path_segments(path)
+
     def get_metadata(self):
         result = {}
         for item in settings.SEO_FIELDS:
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import re
+
+PARAMETER_RE = re.compile(r'\{\d+\}')
+PARAMETER_REGEX = r'([\w\d\-]+)'
+
+REGEX_SPECIAL_CHARS = '.^$*+?{}[]\\|()'
+REGEX_OPTIONAL_CHARS = '*?{'
+
+
+def compile_path(path):
+    """
+    Builds the compiled regex used to match request paths against a
+    parameterized SeoMetadata path. Each '{X}' parameter captures a group.
+    """
+    regex_path = PARAMETER_RE.sub(PARAMETER_REGEX, path)
+    return re.compile('^' + regex_path + '/?$')
+
+
+def literal_prefix(path):
+    """
+    Returns the leading part of a parameterized path that any matching
+    request path must start with. Stops at the first regex special char,
+    so the result is always safe to test with str.startswith.
+    """
+    if '|' in path:
+        # Alternation may match paths with any other prefix
+        return ''
+
+    for position, char in enumerate(path):
+        if char in REGEX_SPECIAL_CHARS:
+            if char in REGEX_OPTIONAL_CHARS and not PARAMETER_RE.match(path, position):
+                # Previous char may be optional (or repeated)
+                position = max(position - 1, 0)
+            return path[:position]
+    return path
+
+
+def get_path_prefix(path):
+    """
+    Returns the literal leading segments of a parameterized path, up to
+    the last '/' of its literal prefix, e.g. '/camping/' for
+    '/camping/{0}/{1}/'. Matching request paths always start with it.
+    """
+    prefix = literal_prefix(path)
+    return prefix[:prefix.rfind('/') + 1]
+
+
+def get_path_segments(path):
+    """
+    Returns the number of non empty segments of a parameterized path,
+    which is the same for any request path matching it. Returns None if
+    the path has regex special chars, as the number can not be known.
+    """
+    literal_path = PARAMETER_RE.sub('', path)
+    for char in REGEX_SPECIAL_CHARS:
+        if char in literal_path:
+            return None
+    return count_segments(path)
+
+
+def count_segments(path):
+    return len([segment for segment in path.split('/') if segment])
+
+
+def candidate_prefixes(path):
+    """
+    Returns all the values get_path_prefix may have for the
+    parameterized paths matching the given request path.
+    """
+    prefixes = ['']
+    position = path.find('/')
+    while position >= 0:
+        prefixes.append(path[:position + 1])
+        position = path.find('/', position + 1)
+    return prefixes
@@ -36,3 +36,69 @@ else:
 SEO_MODELS = getattr(settings, 'SEO_MODELS', [])
 
 SEO_FIELDS = ['title', 'description']
+
+# Cache for resolved (not formatted yet) metadata
+CACHE_ENABLED = getattr(settings, 'SEO_CACHE_ENABLED', False)
+CACHE_ALIAS = getattr(settings, 'SEO_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'SEO_CACHE_TIMEOUT', 60 * 60)
+CACHE_LOCAL_SIZE = getattr(settings, 'SEO_CACHE_LOCAL_SIZE', 1000)
+CACHE_LOCAL_TIMEOUT = getattr(settings, 'SEO_CACHE_LOCAL_TIMEOUT', 60)
+
+# Paths without any SeoMetadata (exact or parameterized) remembered per
+# process, so their lookups go straight to the fallbacks. 0 to disable.
+NEGATIVE_CACHE_SIZE = getattr(settings, 'SEO_NEGATIVE_CACHE_SIZE', 10000)
+NEGATIVE_CACHE_TIMEOUT = getattr(settings, 'SEO_NEGATIVE_CACHE_TIMEOUT', 5 * 60)
+
+# Max seconds a process may keep using its in-memory data (compiled paths,
+# model defaults...) after a change done by another process. None to
+# disable the check, for single process deployments.
+CACHE_SYNC_INTERVAL = getattr(settings, 'SEO_CACHE_SYNC_INTERVAL', 1.0)
+
+# Max number of parsed title/description strings kept in memory
+TEMPLATE_CACHE_SIZE = getattr(settings, 'SEO_TEMPLATE_CACHE_SIZE', 5000)
+
+# Hash used to rotate between the titles/descriptions matching a path.
+# 'md5' keeps the rotation of previous versions, 'crc32' is cheaper.
+PATH_HASH = getattr(settings, 'SEO_PATH_HASH', 'md5')
+if PATH_HASH not in ('md5', 'crc32'):
+    raise ImproperlyConfigured("SEO_PATH_HASH must be either 'md5' or 'crc32'.")
+
+# Keep the parameterized paths compiled in memory. If disabled, they are
+# narrowed in the database on every lookup instead.
+PATH_INDEX = getattr(settings, 'SEO_PATH_INDEX', True)
+
+# Timing and query count of every SEO resolution, see instrumentation.py
+INSTRUMENTATION = getattr(settings, 'SEO_INSTRUMENTATION', False)
+INSTRUMENTATION_FLUSH = getattr(settings, 'SEO_INSTRUMENTATION_FLUSH', 100)
+INSTRUMENTATION_SLOW_MS = getattr(settings, 'SEO_INSTRUMENTATION_SLOW_MS', None)
+
+# Serve the final metadata of registered model instances from the cache,
+# see the materialize_seo command
+MATERIALIZED = getattr(settings, 'SEO_MATERIALIZED', False)
+
+# Seconds to keep each materialized entry. None to keep them until changed
+MATERIALIZED_TIMEOUT = getattr(settings, 'SEO_MATERIALIZED_TIMEOUT', 86400)
+
+# Template context variables available to the titles and descriptions
+# ('__all__' for all of them, as previous versions did with the view
+# context), unless the view defines get_seo_context
+CONTEXT_VARIABLES = getattr(settings, 'SEO_CONTEXT_VARIABLES', '__all__')
+
+# Call view.get_context_data() again to build the seo context, as
+# previous versions did, instead of using the template context
+VIEW_CONTEXT_DATA = getattr(settings, 'SEO_VIEW_CONTEXT_DATA', False)
+
+# Seconds the seo tags wait for the lookup started by SeoLookupMiddleware
+# before resolving the metadata themselves
+LOOKUP_TIMEOUT = getattr(settings, 'SEO_LOOKUP_TIMEOUT', 1.0)
+
+# Path prefixes whose metadata SeoLookupMiddleware looks up concurrently
+# with the view, besides the views marked with prefetch_seo
+LOOKUP_PATHS = getattr(settings, 'SEO_LOOKUP_PATHS', ())
+
+# Keep the HTML rendered by the get_seo tag in the django cache, by path
+# and language
+FRAGMENT_CACHE = getattr(settings, 'SEO_FRAGMENT_CACHE', False)
+
+# Seconds to keep the rendered get_seo HTML. None to keep it until changed
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'SEO_FRAGMENT_CACHE_TIMEOUT', 3600)
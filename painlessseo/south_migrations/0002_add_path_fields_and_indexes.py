@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding field 'SeoMetadata.path_prefix'
+        db.add_column(u'painlessseo_seometadata', 'path_prefix',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=200, blank=True),
+                      keep_default=False)
+
+        # Adding field 'SeoMetadata.path_segments'
+        db.add_column(u'painlessseo_seometadata', 'path_segments',
+                      self.gf('django.db.models.fields.PositiveSmallIntegerField')(null=True, blank=True),
+                      keep_default=False)
+
+        # Adding index on 'SeoMetadata', fields ['lang_code', 'has_parameters', 'path_prefix']
+        db.create_index(u'painlessseo_seometadata', ['lang_code', 'has_parameters', 'path_prefix'])
+
+        # Adding index on 'SeoMetadata', fields ['content_type', 'object_id', 'lang_code']
+        db.create_index(u'painlessseo_seometadata', ['content_type_id', 'object_id', 'lang_code'])
+
+        # Adding index on 'SeoMetadata', fields ['lang_code', 'has_parameters', u'id']
+        db.create_index(u'painlessseo_seometadata', ['lang_code', 'has_parameters', u'id'])
+
+        # Adding index on 'SeoMetadata', fields ['path', 'lang_code']
+        db.create_index(u'painlessseo_seometadata', ['path', 'lang_code'])
+
+
+    def backwards(self, orm):
+        # Removing index on 'SeoMetadata', fields ['path', 'lang_code']
+        db.delete_index(u'painlessseo_seometadata', ['path', 'lang_code'])
+
+        # Removing index on 'SeoMetadata', fields ['lang_code', 'has_parameters', u'id']
+        db.delete_index(u'painlessseo_seometadata', ['lang_code', 'has_parameters', u'id'])
+
+        # Removing index on 'SeoMetadata', fields ['content_type', 'object_id', 'lang_code']
+        db.delete_index(u'painlessseo_seometadata', ['content_type_id', 'object_id', 'lang_code'])
+
+        # Removing index on 'SeoMetadata', fields ['lang_code', 'has_parameters', 'path_prefix']
+        db.delete_index(u'painlessseo_seometadata', ['lang_code', 'has_parameters', 'path_prefix'])
+
+        # Deleting field 'SeoMetadata.path_prefix'
+        db.delete_column(u'painlessseo_seometadata', 'path_prefix')
+
+        # Deleting field 'SeoMetadata.path_segments'
+        db.delete_column(u'painlessseo_seometadata', 'path_segments')
+
+
+    models = {
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'painlessseo.seometadata': {
+            'Meta': {'ordering': "('path', 'lang_code')", 'object_name': 'SeoMetadata', 'index_together': "[('path', 'lang_code'), ('lang_code', 'has_parameters', 'id'), ('lang_code', 'has_parameters', 'path_prefix'), ('content_type', 'object_id', 'lang_code')]"},
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']", 'null': 'True', 'blank': 'True'}),
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True'}),
+            'has_parameters': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lang_code': ('django.db.models.fields.CharField', [], {'default': "'en'", 'max_length': '2'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'path': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True', 'db_index': 'True'}),
+            'path_prefix': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '200', 'blank': 'True'}),
+            'path_segments': ('django.db.models.fields.PositiveSmallIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'})
+        },
+        u'painlessseo.seoregisteredmodel': {
+            'Meta': {'object_name': 'SeoRegisteredModel'},
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']", 'null': 'True', 'blank': 'True'}),
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lang_code': ('django.db.models.fields.CharField', [], {'default': "'en'", 'max_length': '2'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['painlessseo']
\ No newline at end of file
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import DataMigration
+from django.db import models
+
+from painlessseo.paths import get_path_prefix, get_path_segments
+
+BATCH_SIZE = 1000
+
+
+class Migration(DataMigration):
+
+    def forwards(self, orm):
+        "Precompute path_prefix and path_segments for existing SeoMetadata."
+        queryset = orm.SeoMetadata.objects.order_by('id')
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id).values_list('id', 'path')[:BATCH_SIZE])
+            if not rows:
+                break
+            # One UPDATE per batch and distinct (prefix, segments) values
+            groups = {}
+            for sm_id, path in rows:
+                key = (get_path_prefix(path or ''), get_path_segments(path or ''))
+                groups.setdefault(key, []).append(sm_id)
+            for (path_prefix, path_segments), ids in groups.items():
+                queryset.filter(id__in=ids).update(
+                    path_prefix=path_prefix, path_segments=path_segments)
+            last_id = rows[-1][0]
+
+    def backwards(self, orm):
+        "Nothing to do, the columns are dropped by the previous migration."
+
+    models = {
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'painlessseo.seometadata': {
+            'Meta': {'ordering': "('path', 'lang_code')", 'object_name': 'SeoMetadata', 'index_together': "[('path', 'lang_code'), ('lang_code', 'has_parameters', 'id'), ('lang_code', 'has_parameters', 'path_prefix'), ('content_type', 'object_id', 'lang_code')]"},
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']", 'null': 'True', 'blank': 'True'}),
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True'}),
+            'has_parameters': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lang_code': ('django.db.models.fields.CharField', [], {'default': "'en'", 'max_length': '2'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'path': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True', 'db_index': 'True'}),
+            'path_prefix': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '200', 'blank': 'True'}),
+            'path_segments': ('django.db.models.fields.PositiveSmallIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'})
+        },
+        u'painlessseo.seoregisteredmodel': {
+            'Meta': {'object_name': 'SeoRegisteredModel'},
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']", 'null': 'True', 'blank': 'True'}),
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lang_code': ('django.db.models.fields.CharField', [], {'default': "'en'", 'max_length': '2'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['painlessseo']
+    symmetrical = True
@@ -1,16 +1,30 @@
 # Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
 # License: BSD 3-Clause
 
-from django.template import Library
+from django.template import Context, Library
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
 from django.utils.translation import get_language
 
 from painlessseo import settings
-from painlessseo.models import SeoMetadata
-from painlessseo.utils import get_path_metadata
+from painlessseo.utils import format_path_metadata
+from painlessseo.instrumentation import measure, set_branch
+from painlessseo.fragments import fragments
+from painlessseo.materialized import materialized
+from painlessseo.middleware import REQUEST_LOOKUP_ATTR
 from django import template
 
 register = Library()
 
+REQUEST_CACHE_ATTR = '_painlessseo_metadata'
+
+# SEO_CONTEXT_VARIABLES value to use the whole template context
+ALL_VARIABLES = '__all__'
+
+METADATA_TEMPLATE = 'painlessseo/metadata.html'
+
+_metadata_template = None
+
 
 @register.filter
 def single_quotes(description):
@@ -42,36 +56,129 @@ class CaptureAsNode(template.Node):
         return ''
 
 
-@register.inclusion_tag('painlessseo/metadata.html', takes_context=True)
-def get_seo(context, **kwargs):
-    path = context['request'].path
-    lang_code = get_language()[:2]
-    view = context.get('view', None)
-    seo_context = {}
-    seo_obj = None
-
-    if view:
-        # Try to get the instance if exists
+def get_template_context(context, names):
+    """
+    Returns the values of the given template context variable names as a
+    dict, or all of them (including the ones of context processors, such
+    as 'user' or 'request') if names is ALL_VARIABLES.
+    """
+    if names != ALL_VARIABLES:
+        values = {}
+        for name in names:
+            try:
+                values[name] = context[name]
+            except KeyError:
+                pass
+        return values
+
+    values = {}
+    for context_dict in context.dicts:
+        # Inner dicts take precedence
+        values.update(context_dict)
+    return values
+
+
+def get_seo_object(context, view):
+    # Reuse the instance already fetched by the view
+    seo_obj = context.get('object', None)
+    if seo_obj is None:
+        seo_obj = getattr(view, 'object', None)
+    if seo_obj is None:
         try:
             if hasattr(view, 'get_object'):
                 seo_obj = view.get_object()
         except AttributeError:
             pass
+    return seo_obj
+
 
-        # Try to get seo_context
+def get_seo_context(context, view):
+    if hasattr(view, 'get_seo_context'):
+        return view.get_seo_context()
+
+    if getattr(view, 'seo_view_context_data', settings.VIEW_CONTEXT_DATA):
+        seo_context = {}
         try:
             if hasattr(view, 'get_context_data'):
                 seo_context.update(view.get_context_data())
         except Exception:
             pass
+        return seo_context
+
+    return get_template_context(
+        context, getattr(view, 'seo_context_variables', settings.CONTEXT_VARIABLES))
+
+
+def resolve_metadata(context, path, lang_code):
+    view = context.get('view', None)
+    seo_context = {}
+    seo_obj = None
 
-        if hasattr(view, 'get_seo_context'):
-            seo_context = view.get_seo_context()
+    if view:
+        seo_obj = get_seo_object(context, view)
+        seo_context = get_seo_context(context, view)
 
-    metadata = get_path_metadata(
+    # Only the fragment cache needs to know whether it can be shared
+    return format_path_metadata(
         path=path, lang_code=lang_code,
         instance=seo_obj,
-        seo_context=seo_context)
+        seo_context=seo_context,
+        context_free=fragments.enabled)
+
+
+def get_request_entry(context):
+    """
+    Resolves the metadata for the current request only once, so all the
+    seo tags used while rendering the same request share the lookup.
+    Returns a (metadata, context_free) tuple, see utils.format_path_metadata.
+    """
+    request = context['request']
+    path = request.path
+    lang_code = get_language()[:2]
+
+    request_cache = getattr(request, REQUEST_CACHE_ATTR, None)
+    if request_cache is None:
+        request_cache = {}
+        setattr(request, REQUEST_CACHE_ATTR, request_cache)
+
+    key = (path, lang_code)
+    if key not in request_cache:
+        with measure('get_seo', path, lang_code):
+            metadata = None
+            lookup = getattr(request, REQUEST_LOOKUP_ATTR, None)
+            if (lookup is not None and lookup.path == path and
+                    lookup.lang_code == lang_code):
+                # Started by SeoLookupMiddleware
+                metadata = lookup.result(settings.LOOKUP_TIMEOUT)
+                if metadata is not None:
+                    set_branch('prefetched', cached=True)
+            if metadata is None:
+                metadata = materialized.get(path, lang_code)
+                if metadata is not None:
+                    set_branch('materialized', cached=True)
+            if metadata is None:
+                request_cache[key] = resolve_metadata(context, path, lang_code)
+            else:
+                # Both only keep metadata that does not depend on the view
+                request_cache[key] = (metadata, True)
+    return request_cache[key]
+
+
+def get_request_metadata(context):
+    return get_request_entry(context)[0]
+
+
+def get_metadata_template():
+    global _metadata_template
+    if _metadata_template is None:
+        template = get_template(METADATA_TEMPLATE)
+        # Django >= 1.8 wraps it in a backend template
+        _metadata_template = getattr(template, 'template', template)
+    return _metadata_template
+
+
+def get_seo_metadata(context, **kwargs):
+    metadata = get_request_metadata(context)
 
     result = {}
     for item in ['title', 'description']:
@@ -81,11 +188,42 @@ def get_seo(context, **kwargs):
     return result
 
 
+def render_seo(context, **kwargs):
+    result = get_seo_metadata(context, **kwargs)
+    return get_metadata_template().render(
+        Context(result, autoescape=context.autoescape))
+
+
+@register.simple_tag(takes_context=True)
+def get_seo(context, **kwargs):
+    if not fragments.enabled or 'request' not in context:
+        return mark_safe(render_seo(context, **kwargs))
+
+    request = context['request']
+    path = request.path
+    lang_code = get_language()[:2]
+    defaults = tuple(sorted(kwargs.items()))
+
+    html = fragments.get(path, lang_code, defaults)
+    if html is not None:
+        # Misses are measured by get_request_metadata
+        with measure('get_seo', path, lang_code):
+            set_branch('fragment', cached=True)
+        return mark_safe(html)
+
+    html = render_seo(context, **kwargs)
+    metadata, context_free = get_request_entry(context)
+    if context_free:
+        # Only the HTML that does not depend on the view can be shared
+        fragments.set(path, lang_code, defaults, html)
+    return mark_safe(html)
+
+
 @register.simple_tag(takes_context=True)
 def get_seo_title(context, default=''):
-    return get_seo(context, title=default).get('title')
+    return get_seo_metadata(context, title=default).get('title')
 
 
 @register.simple_tag(takes_context=True)
 def get_seo_description(context, default=''):
-    return get_seo(context, description=default).get('description')
+    return get_seo_metadata(context, description=default).get('description')
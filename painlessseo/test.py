@@ -1,2 +0,0 @@
-# -*- coding: utf-8 -*-
-from django.utils import unittest
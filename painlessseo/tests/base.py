@@ -0,0 +1,81 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import sys
+from contextlib import contextmanager
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase
+
+from painlessseo import settings
+from painlessseo.cache import invalidation_batch, local_caches, metadata_cache
+from painlessseo.fragments import fragments
+from painlessseo.materialized import materialized
+from painlessseo.utils import register_seo_signals
+
+LANG_CODE = settings.DEFAULT_LANG_CODE
+
+# Django < 1.7 only registers them along with painlessseo.admin
+register_seo_signals()
+
+
+def clear_caches():
+    """
+    Drops all the cached metadata, as the database is rolled back after
+    each test but the caches are not.
+    """
+    local_caches.clear()
+    metadata_cache.generation.bump()
+    materialized.generation.bump()
+    fragments.generation.bump()
+    invalidation_batch.uncommitted.clear()
+
+
+@contextmanager
+def override_seo_settings(**values):
+    """
+    Changes painlessseo.settings values inside the block, as they are
+    read from the django settings only once.
+    """
+    previous = dict((name, getattr(settings, name)) for name in values)
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+def call_command_output(name, *args, **options):
+    """
+    Runs a management command and returns what it printed.
+    """
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        call_command(name, *args, **options)
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout = stdout
+
+
+class SeoTestCase(TestCase):
+
+    def setUp(self):
+        clear_caches()
+
+    def tearDown(self):
+        clear_caches()
+
+
+def render_tags(source, request=None, **context):
+    """
+    Renders the given template source with the seo tags loaded, and the
+    request (if any) in the context.
+    """
+    if request is not None:
+        context['request'] = request
+    return Template('{% load seo %}' + source).render(Context(context))
@@ -0,0 +1,103 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test.client import RequestFactory
+
+from painlessseo.admin import RegisteredSeoModelsFilter, SeoMetadataInline
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.tests.base import LANG_CODE, SeoTestCase
+from painlessseo.tests.testapp.models import Article, Author
+
+
+class SeoMetadataAdminTest(SeoTestCase):
+
+    def setUp(self):
+        super(SeoMetadataAdminTest, self).setUp()
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        for path in ('/camping/spain/', '/camping/france/', '/hotels/camping/'):
+            SeoMetadata.objects.create(
+                path=path, lang_code=LANG_CODE, title='Title', description='Description')
+
+    def search(self, term):
+        response = self.client.get('/admin/painlessseo/seometadata/', {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return sorted([sm.path for sm in response.context['cl'].result_list])
+
+    def test_path_prefix_search(self):
+        self.assertEqual(self.search('/camping/'), ['/camping/france/', '/camping/spain/'])
+
+    def test_text_search(self):
+        self.assertEqual(
+            self.search('camping'), ['/camping/france/', '/camping/spain/', '/hotels/camping/'])
+
+    def test_model_filter(self):
+        for model in (Article, Author):
+            SeoRegisteredModel.objects.create(
+                content_type=ContentType.objects.get_for_model(model), lang_code=LANG_CODE,
+                title='Title', description='Description')
+        model_admin = admin.site._registry[SeoMetadata]
+        request = RequestFactory().get('/')
+        list_filter = RegisteredSeoModelsFilter(request, {}, SeoMetadata, model_admin)
+        self.assertEqual(list_filter.lookups(request, model_admin), [
+            (ContentType.objects.get_for_model(Article).id, 'article'),
+            (ContentType.objects.get_for_model(Author).id, 'author'),
+            ])
+        # Kept in memory
+        with self.assertNumQueries(0):
+            list_filter.lookups(request, model_admin)
+
+    def test_add_form(self):
+        response = self.client.get('/admin/painlessseo/seometadata/add/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse('object_id' in response.context['adminform'].form.fields)
+
+
+class SeoMetadataInlineTest(SeoTestCase):
+
+    def setUp(self):
+        super(SeoMetadataInlineTest, self).setUp()
+        self.article = Article.objects.create(slug='inline', name='Inline')
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        inline = SeoMetadataInline(Article, admin.site)
+        self.formset_class = inline.get_formset(request, self.article)
+        self.prefix = self.formset_class.get_default_prefix()
+
+    def make_formset(self, *lang_codes):
+        data = {
+            '%s-TOTAL_FORMS' % self.prefix: str(len(lang_codes)),
+            '%s-INITIAL_FORMS' % self.prefix: '0',
+            '%s-MAX_NUM_FORMS' % self.prefix: '1000',
+            }
+        for index, lang_code in enumerate(lang_codes):
+            data['%s-%d-lang_code' % (self.prefix, index)] = lang_code
+            data['%s-%d-title' % (self.prefix, index)] = 'Title %s' % lang_code
+            data['%s-%d-description' % (self.prefix, index)] = 'Description'
+        return self.formset_class(data, instance=self.article, prefix=self.prefix)
+
+    def test_paths_from_instance(self):
+        formset = self.make_formset('en', 'es')
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+        self.assertEqual(
+            sorted(SeoMetadata.objects.values_list('lang_code', 'path', 'object_id')),
+            [('en', '/articles/inline/', self.article.pk),
+             ('es', '/articles/inline/', self.article.pk)])
+
+    def test_existing_language_rejected(self):
+        SeoMetadata.objects.create(
+            path='/articles/inline/', lang_code='es', content_object=self.article,
+            title='Title', description='Description')
+        formset = self.make_formset('en', 'es')
+        self.assertFalse(formset.is_valid())
+        self.assertTrue('language es' in formset.non_form_errors()[0])
+
+    def test_one_query_for_existing_languages(self):
+        self.make_formset('en').is_valid()
+        formset = self.make_formset('en', 'es')
+        with self.assertNumQueries(1):
+            formset.is_valid()
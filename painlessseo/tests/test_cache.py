@@ -0,0 +1,182 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_finished
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from painlessseo import settings
+from painlessseo.cache import (
+    LocalCaches, batch_invalidations, invalidation_batch, local_caches,
+    metadata_cache, registered_metadata, unmatched_paths
+    )
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.tests.base import LANG_CODE, SeoTestCase, clear_caches
+from painlessseo.utils import get_path_metadata
+
+
+class MetadataCacheTest(SeoTestCase):
+
+    def setUp(self):
+        super(MetadataCacheTest, self).setUp()
+        self.enabled = metadata_cache.enabled
+        metadata_cache.enabled = True
+        self.seometadata = SeoMetadata.objects.create(
+            path='/cached/', lang_code=LANG_CODE, title='Cached', description='Description')
+
+    def tearDown(self):
+        metadata_cache.enabled = self.enabled
+        super(MetadataCacheTest, self).tearDown()
+
+    def test_cached(self):
+        self.assertEqual(get_path_metadata('/cached/', LANG_CODE)['title'], 'Cached')
+        self.assertNotEqual(metadata_cache.get('/cached/', LANG_CODE), None)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_path_metadata('/cached/', LANG_CODE)['title'], 'Cached')
+
+    def test_save_invalidates(self):
+        get_path_metadata('/cached/', LANG_CODE)
+        self.seometadata.title = 'Changed'
+        self.seometadata.save()
+        self.assertEqual(metadata_cache.get('/cached/', LANG_CODE), None)
+        self.assertEqual(get_path_metadata('/cached/', LANG_CODE)['title'], 'Changed')
+
+    def test_delete_invalidates(self):
+        get_path_metadata('/cached/', LANG_CODE)
+        self.seometadata.delete()
+        self.assertEqual(metadata_cache.get('/cached/', LANG_CODE), None)
+        self.assertNotEqual(get_path_metadata('/cached/', LANG_CODE)['title'], 'Cached')
+
+    def test_registered_model_save_invalidates(self):
+        user = User.objects.create(username='cached')
+        get_path_metadata('/user/', LANG_CODE, instance=user)
+        SeoRegisteredModel.objects.create(
+            content_type=ContentType.objects.get_for_model(User), lang_code=LANG_CODE,
+            title='User {username}', description='Description')
+        self.assertEqual(
+            get_path_metadata('/user/', LANG_CODE, instance=user)['title'], 'User cached')
+
+    def test_batch_invalidations(self):
+        get_path_metadata('/cached/', LANG_CODE)
+        generation = metadata_cache.generation.get()
+        with batch_invalidations():
+            for index in range(3):
+                self.seometadata.title = 'Changed %d' % index
+                self.seometadata.save()
+            # Not read while pending
+            self.assertEqual(metadata_cache.get('/cached/', LANG_CODE), None)
+            self.assertEqual(metadata_cache.generation.get(), generation)
+            self.assertEqual(get_path_metadata('/cached/', LANG_CODE)['title'], 'Changed 2')
+        self.assertEqual(metadata_cache.generation.get(), generation + 1)
+        self.assertEqual(get_path_metadata('/cached/', LANG_CODE)['title'], 'Changed 2')
+
+
+class UncommittedInvalidationsTest(TransactionTestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.enabled = metadata_cache.enabled
+        metadata_cache.enabled = True
+
+    def tearDown(self):
+        metadata_cache.enabled = self.enabled
+        clear_caches()
+
+    def test_bumped_again_after_commit(self):
+        with transaction.atomic():
+            SeoMetadata.objects.create(
+                path='/cached/', lang_code=LANG_CODE, title='Cached', description='Description')
+            generation = metadata_cache.generation.get()
+            request_finished.send(sender=None)
+            # Still inside the transaction
+            self.assertEqual(metadata_cache.generation.get(), generation)
+        request_finished.send(sender=None)
+        self.assertEqual(metadata_cache.generation.get(), generation + 1)
+        self.assertFalse(invalidation_batch.uncommitted)
+
+    def test_not_bumped_again_in_autocommit(self):
+        SeoMetadata.objects.create(
+            path='/cached/', lang_code=LANG_CODE, title='Cached', description='Description')
+        generation = metadata_cache.generation.get()
+        request_finished.send(sender=None)
+        self.assertEqual(metadata_cache.generation.get(), generation)
+
+
+class LocalCachesTest(SeoTestCase):
+
+    def setUp(self):
+        super(LocalCachesTest, self).setUp()
+        # Another process, checking on every request
+        self.cleared = []
+        self.other = LocalCaches(alias=settings.CACHE_ALIAS, interval=0)
+        self.other.register(lambda: self.cleared.append(True))
+        self.other.check()
+        self.cleared = []
+
+    def test_not_cleared_without_changes(self):
+        self.assertFalse(self.other.check())
+        self.assertEqual(self.cleared, [])
+
+    def test_cleared_on_save(self):
+        seometadata = SeoMetadata.objects.create(
+            path='/local/', lang_code=LANG_CODE, title='Local', description='Description')
+        self.assertTrue(self.other.check())
+        self.assertEqual(self.cleared, [True])
+        self.assertFalse(self.other.check())
+
+        seometadata.delete()
+        self.assertTrue(self.other.check())
+
+    def test_cleared_on_registered_model_save(self):
+        SeoRegisteredModel.objects.create(
+            content_type=ContentType.objects.get_for_model(User), lang_code=LANG_CODE,
+            title='Title', description='Description')
+        self.assertTrue(self.other.check())
+
+    def test_broadcast_once_per_batch(self):
+        generation = local_caches.generation.get()
+        with batch_invalidations():
+            for index in range(3):
+                SeoMetadata.objects.create(
+                    path='/local/%d/' % index, lang_code=LANG_CODE,
+                    title='Local', description='Description')
+        self.assertEqual(local_caches.generation.get(), generation + 1)
+        self.assertTrue(self.other.check())
+
+    def test_registered_metadata_invalidated(self):
+        ctype = ContentType.objects.get_for_model(User)
+        self.assertEqual(registered_metadata.get(ctype.id, LANG_CODE), [])
+        SeoRegisteredModel.objects.create(
+            content_type=ctype, lang_code=LANG_CODE, title='Title', description='Description')
+        self.assertEqual(registered_metadata.get(ctype.id, LANG_CODE), [('Title', 'Description')])
+
+
+class UnmatchedPathsTest(SeoTestCase):
+
+    def test_remembered(self):
+        get_path_metadata('/unmatched/', LANG_CODE)
+        self.assertTrue(unmatched_paths.get(('/unmatched/', LANG_CODE)))
+        with self.assertNumQueries(0):
+            get_path_metadata('/unmatched/', LANG_CODE)
+
+    def test_exact_save_invalidates(self):
+        get_path_metadata('/unmatched/', LANG_CODE)
+        get_path_metadata('/other/', LANG_CODE)
+        SeoMetadata.objects.create(
+            path='/unmatched/', lang_code=LANG_CODE, title='Found', description='Description')
+        self.assertEqual(unmatched_paths.get(('/unmatched/', LANG_CODE)), None)
+        self.assertTrue(unmatched_paths.get(('/other/', LANG_CODE)))
+        self.assertEqual(get_path_metadata('/unmatched/', LANG_CODE)['title'], 'Found')
+
+    def test_parameterized_save_invalidates_all(self):
+        get_path_metadata('/unmatched/slug/', LANG_CODE)
+        get_path_metadata('/other/', LANG_CODE)
+        SeoMetadata.objects.create(
+            path='/unmatched/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Found {0}', description='Description')
+        self.assertEqual(unmatched_paths.get(('/unmatched/slug/', LANG_CODE)), None)
+        self.assertEqual(unmatched_paths.get(('/other/', LANG_CODE)), None)
+        self.assertEqual(
+            get_path_metadata('/unmatched/slug/', LANG_CODE)['title'], 'Found Slug')
@@ -0,0 +1,121 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import re
+
+from django.test import SimpleTestCase
+from django.utils.encoding import smart_text
+
+from painlessseo.formatting import compile_template
+
+
+def format_from_params(string, **kwargs):
+    # Previous implementation, replacing every param with a regex
+    result = string
+    if kwargs:
+        for name, value in kwargs.iteritems():
+            value = re.sub('-', ' ', smart_text(value)).title()
+            result = re.sub(
+                r'\{\s*%s\s*\}' % (name), value, result)
+
+    return result
+
+
+def format_from_instance(string, instance=None, lang_code=None):
+    # Previous implementation, replacing every instance value with a regex
+    result = string
+    if instance and lang_code:
+        matches = re.findall(r"\{\s*([^\}\s]+)\s*\}", string)
+        if matches:
+            for match in matches:
+                attrs = match.split('.')
+                base = instance
+                found = True
+                for attr in attrs:
+                    field_lang = "%s_%s" % (attr, lang_code)
+                    if hasattr(base, field_lang):
+                        attr_name = field_lang
+                    elif hasattr(base, attr):
+                        attr_name = attr
+                    elif base is None:
+                        attr_value = None
+                        break
+                    else:
+                        found = False
+                        break
+
+                    attr_value = getattr(base, attr_name)
+                    if hasattr(attr_value, 'get'):
+                        base = attr_value.get()
+                    else:
+                        base = attr_value
+
+                if found:
+                    result = re.sub(
+                        r"\{\s*%s\s*\}" % match,
+                        unicode(attr_value or ''),
+                        result)
+    return result
+
+
+class Author(object):
+    username = 'bob'
+
+
+class Related(object):
+    # Like a related manager
+    def get(self):
+        return Author()
+
+
+class Article(object):
+    name = 'Camping'
+    name_es = 'Acampada'
+    title = u'Glamping \xf1'
+    author = Author()
+    editor = None
+    related = Related()
+    count = 0
+
+
+class CompileTemplateTest(SimpleTestCase):
+    templates = [
+        '',
+        'No placeholders',
+        '{0}',
+        'Path {0} and {1}',
+        'Spaces { 0 } and {1 }',
+        'Repeated {0} {0}',
+        'Instance {name} in {title}',
+        'Dotted {author.username}',
+        'Related manager {related.username}',
+        'Foreign key set to None {editor.username}',
+        'Falsy value {count}',
+        'Unknown {missing} and {0}',
+        'Context {foo} and {name}',
+        u'Unicode \xe1 {name}',
+        'Unbalanced {0',
+        ]
+    params = [
+        {},
+        {'0': 'hello-world'},
+        {'0': 'a-b-c', '1': 'x', 'foo': 'bar-baz'},
+        {'name': 'from-context'},
+        ]
+
+    def test_same_as_regex_formatting(self):
+        for string in self.templates:
+            for lang_code in ('en', 'es'):
+                for instance in (None, Article()):
+                    for params in self.params:
+                        expected = format_from_params(
+                            format_from_instance(string, instance, lang_code), **params)
+                        self.assertEqual(
+                            compile_template(string).render(
+                                instance=instance, lang_code=lang_code, params=params),
+                            expected, (string, lang_code, instance, params))
+
+    def test_names(self):
+        self.assertEqual(
+            compile_template('{0} { name } {author.username} {0}').names,
+            ['0', 'name', 'author.username'])
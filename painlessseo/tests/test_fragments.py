@@ -0,0 +1,129 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.test.client import RequestFactory
+
+from painlessseo.cache import batch_invalidations, invalidate_later
+from painlessseo.fragments import FragmentCache, fragments
+from painlessseo.models import SeoMetadata
+from painlessseo.tests.base import LANG_CODE, SeoTestCase, render_tags
+from painlessseo.tests.testapp.models import Article
+
+
+class FragmentCacheTest(SeoTestCase):
+
+    def setUp(self):
+        super(FragmentCacheTest, self).setUp()
+        self.cache = FragmentCache(enabled=True)
+        self.cache.invalidate()
+
+    def test_variants_stored_apart(self):
+        self.cache.set('/page/', LANG_CODE, (), 'default')
+        self.cache.set('/page/', LANG_CODE, (('title', 'Other'), ), 'other')
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, ()), 'default')
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, (('title', 'Other'), )), 'other')
+        self.assertEqual(self.cache.get('/page/', 'es', ()), None)
+        self.assertEqual(self.cache.get('/other/', LANG_CODE, ()), None)
+
+    def test_delete_many_drops_all_variants(self):
+        self.cache.set('/page/', LANG_CODE, (), 'default')
+        self.cache.set('/page/', LANG_CODE, (('title', 'Other'), ), 'other')
+        self.cache.set('/kept/', LANG_CODE, (), 'kept')
+        self.cache.delete_many([('/page/', LANG_CODE)])
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, ()), None)
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, (('title', 'Other'), )), None)
+        self.assertEqual(self.cache.get('/kept/', LANG_CODE, ()), 'kept')
+
+    def test_new_stamp_hides_previous_variants(self):
+        self.cache.set('/page/', LANG_CODE, (), 'default')
+        self.cache.delete_many([('/page/', LANG_CODE)])
+        # Stored under a new stamp, the previous entry is still in the cache
+        self.cache.set('/page/', LANG_CODE, (('title', 'Other'), ), 'other')
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, ()), None)
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, (('title', 'Other'), )), 'other')
+
+    def test_invalidate_drops_all(self):
+        self.cache.set('/page/', LANG_CODE, (), 'default')
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, ()), None)
+
+    def test_not_used_while_pending(self):
+        self.cache.set('/page/', LANG_CODE, (), 'default')
+        with batch_invalidations():
+            invalidate_later(self.cache.invalidate)
+            self.assertEqual(self.cache.get('/page/', LANG_CODE, ()), None)
+            self.cache.set('/pending/', LANG_CODE, (), 'pending')
+        self.assertEqual(self.cache.get('/pending/', LANG_CODE, ()), None)
+
+    def test_disabled(self):
+        self.cache.enabled = False
+        self.cache.set('/page/', LANG_CODE, (), 'default')
+        self.assertEqual(self.cache.get('/page/', LANG_CODE, ()), None)
+
+
+class GetSeoFragmentTest(SeoTestCase):
+
+    def setUp(self):
+        super(GetSeoFragmentTest, self).setUp()
+        self.enabled = fragments.enabled
+        fragments.enabled = True
+        self.factory = RequestFactory()
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title='Exact', description='Description')
+        SeoMetadata.objects.create(
+            path='/category/', lang_code=LANG_CODE,
+            title='Category {category}', description='Description')
+
+    def tearDown(self):
+        fragments.enabled = self.enabled
+        super(GetSeoFragmentTest, self).tearDown()
+
+    def render(self, path, source='{% get_seo %}', **context):
+        return render_tags(source, self.factory.get(path), **context)
+
+    def test_stored_and_reused(self):
+        html = self.render('/exact/')
+        self.assertTrue('<title>Exact</title>' in html)
+        self.assertEqual(fragments.get('/exact/', LANG_CODE, ()), html)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render('/exact/'), html)
+
+    def test_keyed_by_tag_arguments(self):
+        # Template tag argument values are unicode
+        defaults = (('title', u'Other'), )
+        self.render('/exact/')
+        self.assertEqual(fragments.get('/exact/', LANG_CODE, defaults), None)
+        html = self.render('/exact/', '{% get_seo title="Other" %}')
+        self.assertEqual(fragments.get('/exact/', LANG_CODE, defaults), html)
+
+    def test_context_values_not_stored(self):
+        class View(object):
+            def get_seo_context(self):
+                return {'category': 'Shoes'}
+
+        html = self.render('/category/', view=View())
+        self.assertTrue('Category Shoes' in html)
+        self.assertEqual(fragments.get('/category/', LANG_CODE, ()), None)
+
+    def test_fallbacks_not_stored(self):
+        self.render('/unmatched/')
+        self.assertEqual(fragments.get('/unmatched/', LANG_CODE, ()), None)
+
+    def test_metadata_change_drops_entries(self):
+        self.render('/exact/')
+        SeoMetadata.objects.filter(path='/category/').get().save()
+        self.assertEqual(fragments.get('/exact/', LANG_CODE, ()), None)
+
+    def test_instance_save_drops_its_entries(self):
+        article = Article.objects.create(slug='stored', name='Stored')
+        SeoMetadata.objects.create(
+            path=article.get_absolute_url(), lang_code=LANG_CODE, content_object=article,
+            title='Article {name}', description='Description')
+        self.render('/exact/')
+        self.render(article.get_absolute_url())
+        self.assertNotEqual(fragments.get(article.get_absolute_url(), LANG_CODE, ()), None)
+        article.name = 'Changed'
+        article.save()
+        self.assertEqual(fragments.get(article.get_absolute_url(), LANG_CODE, ()), None)
+        self.assertNotEqual(fragments.get('/exact/', LANG_CODE, ()), None)
+        self.assertTrue('Article Changed' in self.render(article.get_absolute_url()))
@@ -0,0 +1,129 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import json
+
+from django.db import connection
+from django.test.client import RequestFactory
+
+from painlessseo.instrumentation import (
+    Measurement, QueryCounter, Stats, seo_resolved, stats
+    )
+from painlessseo.models import SeoMetadata
+from painlessseo.tests.base import (
+    LANG_CODE, SeoTestCase, call_command_output, override_seo_settings, render_tags
+    )
+from painlessseo.utils import get_path_metadata
+
+
+def make_measurement(name='get_path_metadata', branch='exact', queries=1, cached=False):
+    measurement = Measurement(name, '/path/', LANG_CODE)
+    measurement.branch = branch
+    measurement.queries = queries
+    measurement.cached = cached
+    measurement.duration = 0.001
+    return measurement
+
+
+class QueryCounterTest(SeoTestCase):
+
+    def test_counts_queries_inside_block(self):
+        SeoMetadata.objects.count()
+        with QueryCounter(connection) as counter:
+            SeoMetadata.objects.count()
+            list(SeoMetadata.objects.all())
+        SeoMetadata.objects.count()
+        self.assertEqual(counter.count, 2)
+
+    def test_connection_restored(self):
+        with QueryCounter(connection):
+            pass
+        self.assertFalse('cursor' in connection.__dict__)
+
+
+class StatsTest(SeoTestCase):
+
+    def setUp(self):
+        super(StatsTest, self).setUp()
+        self.stats = Stats(flush_every=2)
+        self.stats.key_prefix = 'painlessseo:tests:stats'
+        self.stats.reset()
+
+    def test_flushed_every_n_calls(self):
+        self.stats.add(make_measurement())
+        self.assertEqual(self.stats.read()['get_path_metadata.calls'], 0)
+        self.stats.add(make_measurement(branch='fallback', queries=2, cached=True))
+        counters = self.stats.read()
+        self.assertEqual(counters['get_path_metadata.calls'], 2)
+        self.assertEqual(counters['get_path_metadata.queries'], 3)
+        self.assertEqual(counters['get_path_metadata.cached'], 1)
+        self.assertEqual(counters['get_path_metadata.branch.exact'], 1)
+        self.assertEqual(counters['get_path_metadata.branch.fallback'], 1)
+        self.assertEqual(counters['get_path_metadata.time_us'], 2000)
+
+    def test_flush_and_reset(self):
+        self.stats.add(make_measurement(name='get_seo'))
+        self.stats.flush()
+        self.assertEqual(self.stats.read()['get_seo.calls'], 1)
+        self.stats.add(make_measurement(name='get_seo'))
+        self.stats.flush()
+        self.assertEqual(self.stats.read()['get_seo.calls'], 2)
+        self.stats.reset()
+        self.assertEqual(self.stats.read()['get_seo.calls'], 0)
+
+
+class MeasureTest(SeoTestCase):
+
+    def setUp(self):
+        super(MeasureTest, self).setUp()
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title='Exact', description='Description')
+        self.received = []
+        seo_resolved.connect(self.receive, dispatch_uid='painlessseo_tests_receive')
+        stats.reset()
+
+    def tearDown(self):
+        seo_resolved.disconnect(dispatch_uid='painlessseo_tests_receive')
+        stats.reset()
+        super(MeasureTest, self).tearDown()
+
+    def receive(self, sender, **kwargs):
+        self.received.append(kwargs)
+
+    def test_disabled_by_default(self):
+        get_path_metadata('/exact/', LANG_CODE)
+        self.assertEqual(self.received, [])
+
+    def test_signal_sent(self):
+        with override_seo_settings(INSTRUMENTATION=True):
+            get_path_metadata('/exact/', LANG_CODE)
+            get_path_metadata('/unmatched/', LANG_CODE)
+        self.assertEqual(
+            [(values['name'], values['path'], values['branch']) for values in self.received],
+            [('get_path_metadata', '/exact/', 'exact'),
+             ('get_path_metadata', '/unmatched/', 'fallback')])
+        self.assertTrue(self.received[0]['queries'] >= 1)
+
+    def test_tag_includes_inner_resolution(self):
+        with override_seo_settings(INSTRUMENTATION=True):
+            render_tags('{% get_seo %}', RequestFactory().get('/exact/'))
+        self.assertEqual([values['name'] for values in self.received],
+                         ['get_path_metadata', 'get_seo'])
+        inner, outer = self.received
+        self.assertEqual(outer['branch'], 'exact')
+        self.assertTrue(outer['queries'] >= inner['queries'] >= 1)
+
+    def test_seo_stats_command(self):
+        with override_seo_settings(INSTRUMENTATION=True):
+            for path in ('/exact/', '/exact/', '/unmatched/'):
+                get_path_metadata(path, LANG_CODE)
+            stats.flush()
+            counters = json.loads(call_command_output('seo_stats', json=True, reset=True))
+        self.assertEqual(counters['get_path_metadata.calls'], 3)
+        self.assertEqual(counters['get_path_metadata.branch.exact'], 2)
+        self.assertEqual(counters['get_path_metadata.branch.fallback'], 1)
+        self.assertEqual(stats.read()['get_path_metadata.calls'], 0)
+
+        output = call_command_output('seo_stats')
+        self.assertTrue('SEO_INSTRUMENTATION is not enabled' in output)
+        self.assertTrue('get_path_metadata: 0 calls' in output)
@@ -0,0 +1,81 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import random
+
+from painlessseo.matcher import path_index
+from painlessseo.models import SeoMetadata
+from painlessseo.paths import compile_path
+from painlessseo.tests.base import LANG_CODE, SeoTestCase
+
+SEGMENTS = ['a', 'b', 'camping', 'x-y', 'c.d', 'e+', '(f|g)', 'h?']
+PATH_SEGMENTS = ['a', 'b', 'camping', 'x-y', 'zz', 'cxd', 'c.d', 'f', 'g', 'h', 'e', 'ee']
+
+
+class PathPatternIndexTest(SeoTestCase):
+
+    def setUp(self):
+        super(PathPatternIndexTest, self).setUp()
+        self.random = random.Random(0)
+        for index in range(200):
+            segments = []
+            params = 0
+            for position in range(self.random.randint(1, 4)):
+                if self.random.random() < 0.4:
+                    segments.append('{%d}' % params)
+                    params += 1
+                else:
+                    segments.append(self.random.choice(SEGMENTS))
+            if not params:
+                segments.append('{0}')
+            SeoMetadata.objects.create(
+                path='/%s%s' % ('/'.join(segments), self.random.choice(['/', ''])),
+                lang_code=LANG_CODE, has_parameters=True,
+                title='Title %d' % index, description='Description')
+
+    def get_paths(self, count):
+        return [
+            '/%s%s' % ('/'.join([
+                self.random.choice(PATH_SEGMENTS)
+                for position in range(self.random.randint(0, 5))]),
+                self.random.choice(['/', '']))
+            for index in range(count)]
+
+    def match_linear(self, path):
+        # Test every parameterized row one by one
+        matches = []
+        for seometadata in SeoMetadata.objects.filter(
+                lang_code=LANG_CODE, has_parameters=True).order_by('id'):
+            match = compile_path(seometadata.path).match(path)
+            if match:
+                matches.append((seometadata.id, match.groups()))
+        return matches
+
+    def test_match_same_as_linear_scan(self):
+        matched = 0
+        for path in self.get_paths(500):
+            expected = self.match_linear(path)
+            matched += bool(expected)
+            self.assertEqual(
+                [(pattern.id, groups) for pattern, groups in path_index.match(path, LANG_CODE)],
+                expected, path)
+        # Make sure the data tests something
+        self.assertTrue(matched > 50)
+
+    def test_match_in_database_same_as_linear_scan(self):
+        for path in self.get_paths(200):
+            self.assertEqual(
+                [(pattern.id, groups) for pattern, groups in
+                 path_index.match_in_database(path, LANG_CODE)],
+                self.match_linear(path), path)
+
+    def test_saving_rebuilds_index(self):
+        matches = path_index.match('/new-section/slug/', LANG_CODE)
+        seometadata = SeoMetadata.objects.create(
+            path='/new-section/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='New {0}', description='Description')
+        self.assertEqual(
+            [(pattern.id, groups) for pattern, groups in
+             path_index.match('/new-section/slug/', LANG_CODE)],
+            [(pattern.id, groups) for pattern, groups in matches] +
+            [(seometadata.id, ('slug',))])
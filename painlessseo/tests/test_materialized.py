@@ -0,0 +1,104 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.test.client import RequestFactory
+
+from painlessseo.materialized import materialized
+from painlessseo.models import SeoMetadata
+from painlessseo.tests.base import (
+    LANG_CODE, SeoTestCase, call_command_output, render_tags
+    )
+from painlessseo.tests.testapp.models import Article
+from painlessseo.utils import bulk_update_seo, get_path_metadata, materialize_seo
+
+
+class MaterializedTest(SeoTestCase):
+
+    def setUp(self):
+        super(MaterializedTest, self).setUp()
+        self.enabled = materialized.enabled
+        materialized.enabled = True
+        self.article = Article.objects.create(slug='first', name='First')
+        self.seometadata = SeoMetadata.objects.create(
+            path='/articles/first/', lang_code=LANG_CODE, content_object=self.article,
+            title='Article {name}', description='Description')
+
+    def tearDown(self):
+        materialized.enabled = self.enabled
+        super(MaterializedTest, self).tearDown()
+
+    def get(self, path, lang_code=LANG_CODE):
+        return materialized.get(path, lang_code)
+
+    def test_all_languages_stored(self):
+        self.assertEqual(materialize_seo([self.article]), 2)
+        self.assertEqual(self.get('/articles/first/')['title'], 'Article First')
+        # Without SeoMetadata, the fallbacks of the language
+        self.assertEqual(self.get('/articles/first/', 'es')['title'], 'Titulo')
+
+    def test_served_by_get_seo(self):
+        materialize_seo([self.article])
+        request = RequestFactory().get('/articles/first/')
+        with self.assertNumQueries(0):
+            html = render_tags('{% get_seo %}', request)
+        self.assertTrue('<title>Article First</title>' in html)
+
+    def test_context_values_not_stored(self):
+        self.seometadata.title = 'Article {category}'
+        self.seometadata.save()
+        self.assertEqual(self.get('/articles/first/'), None)
+        self.assertEqual(self.get('/articles/first/', 'es')['title'], 'Titulo')
+
+    def test_refreshed_on_instance_save(self):
+        materialize_seo([self.article])
+        self.article.name = 'Renamed'
+        self.article.save()
+        self.assertEqual(self.get('/articles/first/')['title'], 'Article Renamed')
+
+    def test_previous_path_refreshed_on_metadata_save(self):
+        materialize_seo([self.article])
+        self.seometadata.path = '/moved/'
+        self.seometadata.save()
+        # Still the path of the instance, now without SeoMetadata
+        self.assertEqual(
+            self.get('/articles/first/'), get_path_metadata('/articles/first/', LANG_CODE))
+        self.assertEqual(self.get('/moved/'), None)
+
+    def test_previous_path_removed_on_instance_rename(self):
+        materialize_seo([self.article])
+        self.article.slug = 'second'
+        self.article.save()
+        self.assertEqual(self.get('/articles/first/'), None)
+        self.assertEqual(self.get('/articles/first/', 'es'), None)
+        self.assertEqual(self.get('/articles/second/')['title'], 'Article First')
+
+    def test_previous_path_removed_without_metadata(self):
+        article = Article.objects.create(slug='bare', name='Bare')
+        materialize_seo([article])
+        self.assertNotEqual(self.get('/articles/bare/'), None)
+        article.slug = 'renamed'
+        article.save()
+        self.assertEqual(self.get('/articles/bare/'), None)
+        self.assertNotEqual(self.get('/articles/renamed/'), None)
+
+    def test_previous_path_removed_on_bulk_update(self):
+        materialize_seo([self.article])
+        Article.objects.filter(pk=self.article.pk).update(slug='bulk')
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(bulk_update_seo(Article, [article]), (0, 1))
+        self.assertEqual(self.get('/articles/first/'), None)
+        self.assertEqual(self.get('/articles/bulk/')['title'], 'Article First')
+
+    def test_parameterized_save_drops_all(self):
+        materialize_seo([self.article])
+        SeoMetadata.objects.create(
+            path='/other/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Other {0}', description='Description')
+        self.assertEqual(self.get('/articles/first/'), None)
+
+    def test_command(self):
+        Article.objects.create(slug='second', name='Second')
+        output = call_command_output('materialize_seo', clear=True, chunk_size=1)
+        self.assertTrue('2 article materialized on app testapp: 4 entries' in output)
+        self.assertEqual(
+            self.get('/articles/second/'), get_path_metadata('/articles/second/', LANG_CODE))
@@ -0,0 +1,84 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.test.client import RequestFactory
+
+from painlessseo.cache import metadata_cache
+from painlessseo.middleware import (
+    REQUEST_LOOKUP_ATTR, SeoLookupMiddleware, prefetch_seo, should_prefetch
+    )
+from painlessseo.models import SeoMetadata
+from painlessseo.tests.base import (
+    LANG_CODE, SeoTestCase, override_seo_settings, render_tags
+    )
+from painlessseo.utils import get_path_metadata
+
+
+def view(request):
+    pass
+
+
+@prefetch_seo
+def prefetched_view(request):
+    pass
+
+
+class SeoLookupMiddlewareTest(SeoTestCase):
+
+    def setUp(self):
+        super(SeoLookupMiddlewareTest, self).setUp()
+        self.factory = RequestFactory()
+        self.middleware = SeoLookupMiddleware()
+        # The lookup thread has its own database connection, which does not
+        # see the test data, so it is served from the metadata cache
+        self.enabled = metadata_cache.enabled
+        metadata_cache.enabled = True
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title='Exact', description='Description')
+        SeoMetadata.objects.create(
+            path='/category/', lang_code=LANG_CODE,
+            title='Category {category}', description='Description')
+        get_path_metadata('/exact/', LANG_CODE)
+        get_path_metadata('/category/', LANG_CODE)
+
+    def tearDown(self):
+        metadata_cache.enabled = self.enabled
+        super(SeoLookupMiddlewareTest, self).tearDown()
+
+    def process(self, request, view_func):
+        self.middleware.process_view(request, view_func, (), {})
+        return getattr(request, REQUEST_LOOKUP_ATTR, None)
+
+    def test_marked_views(self):
+        request = self.factory.get('/exact/')
+        self.assertTrue(should_prefetch(request, prefetched_view))
+        self.assertFalse(should_prefetch(request, view))
+        self.assertEqual(self.process(request, view), None)
+
+    def test_lookup_paths(self):
+        with override_seo_settings(LOOKUP_PATHS=('/ex', )):
+            self.assertTrue(should_prefetch(self.factory.get('/exact/'), view))
+            self.assertFalse(should_prefetch(self.factory.get('/other/'), view))
+
+    def test_only_safe_methods(self):
+        self.assertEqual(self.process(self.factory.post('/exact/'), prefetched_view), None)
+
+    def test_lookup_used_by_tags(self):
+        request = self.factory.get('/exact/')
+        lookup = self.process(request, prefetched_view)
+        self.assertEqual(lookup.result(5), {'title': 'Exact', 'description': 'Description'})
+        with self.assertNumQueries(0):
+            html = render_tags('{% get_seo %}', request)
+        self.assertTrue('<title>Exact</title>' in html)
+
+    def test_view_dependent_metadata_not_prefetched(self):
+        request = self.factory.get('/category/')
+        lookup = self.process(request, prefetched_view)
+        self.assertEqual(lookup.result(5), None)
+
+        class View(object):
+            def get_seo_context(self):
+                return {'category': 'Shoes'}
+
+        html = render_tags('{% get_seo %}', request, view=View())
+        self.assertTrue('Category Shoes' in html)
@@ -0,0 +1,45 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from painlessseo.models import SeoMetadata
+from painlessseo.tests.base import LANG_CODE, SeoTestCase
+
+
+class SeoMetadataPathFieldsTest(SeoTestCase):
+
+    def get_path_fields(self, seometadata):
+        return SeoMetadata.objects.filter(pk=seometadata.pk).values_list(
+            'path_prefix', 'path_segments').get()
+
+    def test_computed_on_save(self):
+        seometadata = SeoMetadata.objects.create(
+            path='/camping/{0}/{1}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Title', description='Description')
+        self.assertEqual(self.get_path_fields(seometadata), ('/camping/', 3))
+
+    def test_regex_paths(self):
+        seometadata = SeoMetadata.objects.create(
+            path='/camping/spain.*/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Title', description='Description')
+        self.assertEqual(self.get_path_fields(seometadata), ('/camping/', None))
+        # Alternatives may match paths with any prefix
+        seometadata.path = '/camping/(spain|france)/{0}/'
+        seometadata.save()
+        self.assertEqual(self.get_path_fields(seometadata), ('', None))
+
+    def test_saved_with_update_fields(self):
+        seometadata = SeoMetadata.objects.create(
+            path='/camping/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Title', description='Description')
+        seometadata.path = '/hotels/spain/{0}/'
+        seometadata.save(update_fields=['path'])
+        self.assertEqual(self.get_path_fields(seometadata), ('/hotels/spain/', 3))
+
+    def test_update_fields_without_path(self):
+        seometadata = SeoMetadata.objects.create(
+            path='/camping/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Title', description='Description')
+        seometadata.title = 'Changed'
+        seometadata.save(update_fields=['title'])
+        self.assertEqual(self.get_path_fields(seometadata), ('/camping/', 2))
+        self.assertEqual(SeoMetadata.objects.get(pk=seometadata.pk).title, 'Changed')
@@ -0,0 +1,138 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import CommandError
+
+from painlessseo.management.commands.sync_seo_models import (
+    SyncCheckpoint, get_pk_ranges, has_integer_pk, iter_chunks, sync_instances_parallel
+    )
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.tests.base import SeoTestCase, call_command_output
+from painlessseo.tests.testapp.models import Article, Author, Tag
+
+
+class SyncSeoModelsTest(SeoTestCase):
+
+    def setUp(self):
+        super(SyncSeoModelsTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+        author = Author.objects.create(username='writer')
+        self.articles = [
+            Article.objects.create(slug='article-%d' % index, name='Article %d' % index, author=author)
+            for index in range(25)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(SyncSeoModelsTest, self).tearDown()
+
+    def sync(self, **options):
+        options.setdefault('seo_models', 'testapp.article')
+        options.setdefault('sync_instances', True)
+        options.setdefault('update_langs', 'en')
+        options.setdefault('checkpoint', self.checkpoint)
+        return call_command_output('sync_seo_models', **options)
+
+    def get_values(self):
+        return sorted(SeoMetadata.objects.values_list(
+            'object_id', 'lang_code', 'path', 'title', 'description'))
+
+    def test_registered_model_defaults(self):
+        self.sync(sync_instances=False)
+        self.assertEqual(
+            sorted(SeoRegisteredModel.objects.values_list('lang_code', 'title')),
+            [('en', '{name} by {author.username}'), ('es', '{name} de {author.username}')])
+        self.assertFalse(SeoMetadata.objects.exists())
+
+    def test_bulk_same_as_one_by_one(self):
+        self.sync()
+        values = self.get_values()
+        self.assertEqual(len(values), 25)
+        self.assertEqual(values[0][1:3], ('en', '/articles/article-0/'))
+
+        SeoMetadata.objects.all().delete()
+        output = self.sync(bulk=True, chunk_size=7, range_size=10)
+        self.assertTrue('25 article synced on app testapp: 25 created, 0 updated' in output)
+        self.assertEqual(self.get_values(), values)
+        # Finished, so the checkpoint is removed
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_bulk_updates_paths(self):
+        self.sync(bulk=True)
+        Article.objects.filter(pk=self.articles[0].pk).update(slug='moved')
+        output = self.sync(bulk=True, update_langs='en es')
+        self.assertTrue('25 article synced on app testapp: 25 created, 1 updated' in output)
+        self.assertEqual(
+            sorted(SeoMetadata.objects.filter(object_id=self.articles[0].pk).values_list(
+                'lang_code', 'path')),
+            [('en', '/articles/moved/'), ('es', '/articles/moved/')])
+
+    def test_resume(self):
+        ranges = get_pk_ranges('testapp', 'article', 10)
+        checkpoint = SyncCheckpoint(self.checkpoint, 10, ['en'])
+        checkpoint.mark_done('testapp', 'article', ranges[0][0])
+        self.sync(bulk=True, range_size=10, resume=True)
+        pk_from, pk_to = ranges[0]
+        synced = set(SeoMetadata.objects.values_list('object_id', flat=True))
+        self.assertEqual(
+            synced, set([article.pk for article in self.articles if article.pk > pk_to]))
+
+    def test_resume_with_other_languages(self):
+        ranges = get_pk_ranges('testapp', 'article', 10)
+        checkpoint = SyncCheckpoint(self.checkpoint, 10, ['en'])
+        for pk_from, pk_to in ranges:
+            checkpoint.mark_done('testapp', 'article', pk_from)
+        self.sync(bulk=True, range_size=10, resume=True)
+        self.assertFalse(SeoMetadata.objects.exists())
+
+        checkpoint = SyncCheckpoint(self.checkpoint, 10, ['en'])
+        for pk_from, pk_to in ranges:
+            checkpoint.mark_done('testapp', 'article', pk_from)
+        self.sync(bulk=True, range_size=10, resume=True, update_langs='es')
+        self.assertEqual(SeoMetadata.objects.filter(lang_code='es').count(), 25)
+
+    def test_resume_errors(self):
+        with self.assertRaises(CommandError):
+            self.sync(resume=True)
+        with open(self.checkpoint, 'w') as checkpoint_file:
+            json.dump({'range_size': 20, 'done': {}}, checkpoint_file)
+        with self.assertRaises(CommandError):
+            self.sync(bulk=True, range_size=10, resume=True)
+
+    def test_checkpoint_marks_finished_ranges(self):
+        checkpoint = SyncCheckpoint(self.checkpoint, 10, ['en'])
+        results = list(sync_instances_parallel(
+            [('testapp', 'article')], ['en'], checkpoint, chunk_size=4))
+        ranges = get_pk_ranges('testapp', 'article', 10)
+        self.assertEqual(len(results), len(ranges))
+        self.assertEqual(sum([result['count'] for result in results]), 25)
+        loaded = SyncCheckpoint(self.checkpoint, 10, ['en'])
+        loaded.load()
+        for pk_from, pk_to in ranges:
+            self.assertTrue(loaded.is_done('testapp', 'article', pk_from))
+        self.assertFalse(SyncCheckpoint(self.checkpoint, 10, ['es']).is_done(
+            'testapp', 'article', ranges[0][0]))
+
+    def test_pk_ranges(self):
+        ranges = get_pk_ranges('testapp', 'article', 10)
+        pks = [article.pk for article in self.articles]
+        self.assertTrue(ranges[0][0] <= min(pks) and max(pks) <= ranges[-1][1])
+        for pk_from, pk_to in ranges:
+            self.assertEqual(pk_from % 10, 0)
+            self.assertEqual(pk_to, pk_from + 9)
+
+    def test_non_integer_pk(self):
+        self.assertTrue(has_integer_pk(Article))
+        self.assertFalse(has_integer_pk(Tag))
+        self.assertEqual(get_pk_ranges('testapp', 'tag', 10), [])
+        for name in ('red', 'green', 'blue'):
+            Tag.objects.create(name=name)
+        self.assertEqual(get_pk_ranges('testapp', 'tag', 10), [(None, None)])
+        self.assertEqual(
+            [[tag.pk for tag in chunk] for chunk in iter_chunks(Tag.objects.all(), 2)],
+            [['blue', 'green'], ['red']])
@@ -0,0 +1,109 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.tests.base import (
+    LANG_CODE, SeoTestCase, override_seo_settings, render_tags
+    )
+from painlessseo.tests.testapp.models import Article
+
+
+class View(object):
+    """
+    Class based view stand-in, as found in the template context.
+    """
+
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class GetSeoTest(SeoTestCase):
+
+    def setUp(self):
+        super(GetSeoTest, self).setUp()
+        self.factory = RequestFactory()
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title='Exact', description='Description')
+        SeoMetadata.objects.create(
+            path='/category/', lang_code=LANG_CODE,
+            title='Category {category}', description='In {category} by {user}')
+        self.article = Article.objects.create(slug='shown', name='Shown')
+        SeoRegisteredModel.objects.create(
+            content_type=ContentType.objects.get_for_model(Article), lang_code=LANG_CODE,
+            title='Read {name}', description='About {name}')
+
+    def render(self, path, source='{% get_seo %}', **context):
+        return render_tags(source, self.factory.get(path), **context)
+
+    def count_queries(self, path, source):
+        with CaptureQueriesContext(connection) as context:
+            self.render(path, source)
+        return len(context.captured_queries)
+
+    def test_tags_share_the_lookup(self):
+        # Warm up the in-memory data, so only the lookups are counted
+        self.render('/exact/')
+        single = self.count_queries('/exact/', '{% get_seo %}')
+        self.assertTrue(single >= 1)
+        self.assertEqual(single, self.count_queries(
+            '/exact/', '{% get_seo %}{% get_seo_title %}{% get_seo_description %}'))
+
+    def test_title_and_description(self):
+        self.assertEqual(self.render('/exact/', '{% get_seo_title %}'), 'Exact')
+        self.assertEqual(self.render('/exact/', '{% get_seo_description %}'), 'Description')
+
+    def test_whole_context_by_default(self):
+        view = View()
+        html = self.render('/category/', view=view, category='Shoes', user='Ann')
+        self.assertTrue('<title>Category Shoes</title>' in html)
+        self.assertTrue('In Shoes by Ann' in html)
+
+    def test_view_variables(self):
+        view = View(seo_context_variables=['category'])
+        html = self.render('/category/', '{% get_seo_description %}',
+                           view=view, category='Shoes', user='Ann')
+        self.assertTrue('In Shoes by' in html)
+        self.assertFalse('Ann' in html)
+
+    def test_setting_variables(self):
+        with override_seo_settings(CONTEXT_VARIABLES=['user']):
+            html = self.render('/category/', '{% get_seo_description %}',
+                               view=View(), category='Shoes', user='Ann')
+        self.assertFalse('Shoes' in html)
+        self.assertTrue('by Ann' in html)
+
+    def test_get_seo_context(self):
+        view = View(get_seo_context=lambda: {'category': 'Boots'})
+        html = self.render('/category/', '{% get_seo_title %}', view=view, category='Shoes')
+        self.assertEqual(html, 'Category Boots')
+
+    def test_view_context_data(self):
+        view = View(seo_view_context_data=True,
+                    get_context_data=lambda: {'category': 'Boots'})
+        html = self.render('/category/', '{% get_seo_title %}', view=view, category='Shoes')
+        self.assertEqual(html, 'Category Boots')
+
+    def test_context_object(self):
+        def get_object():
+            raise AssertionError('The object of the context must be used')
+
+        view = View(get_object=get_object)
+        html = self.render('/unmatched/', '{% get_seo_title %}', view=view, object=self.article)
+        self.assertEqual(html, 'Read Shown')
+
+    def test_view_object(self):
+        view = View(get_object=lambda: self.article)
+        self.assertEqual(self.render('/unmatched/', '{% get_seo_title %}', view=view), 'Read Shown')
+        view = View(object=self.article)
+        self.assertEqual(self.render('/unmatched/', '{% get_seo_title %}', view=view), 'Read Shown')
+
+    def test_defaults(self):
+        SeoMetadata.objects.create(
+            path='/empty/', lang_code=LANG_CODE, title='', description='Description')
+        self.assertEqual(
+            self.render('/empty/', '{% get_seo_title default="Default" %}'), 'Default')
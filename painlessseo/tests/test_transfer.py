@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from StringIO import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.tests.base import LANG_CODE, SeoTestCase
+from painlessseo.transfer import (
+    FORMATS, METADATA_FIELDS, REGISTERED_FIELDS, import_rows,
+    iter_metadata_rows, iter_registered_rows, read_rows, write_rows
+    )
+from painlessseo.utils import get_path_metadata
+
+
+class TransferTest(SeoTestCase):
+
+    def setUp(self):
+        super(TransferTest, self).setUp()
+        user = User.objects.create(username='exported')
+        self.ctype = ContentType.objects.get_for_model(User)
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title=u'Exact \xf1',
+            description='Description, with "quotes"')
+        SeoMetadata.objects.create(
+            path='/section/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Section {0}', description='Description {0}')
+        SeoMetadata.objects.create(
+            path='/users/exported/', lang_code=LANG_CODE, content_object=user,
+            title='User {username}', description='Description')
+        SeoRegisteredModel.objects.create(
+            content_type=self.ctype, lang_code=LANG_CODE,
+            title='User {username}', description=u'Descripci\xf3n')
+
+    def get_metadata_values(self):
+        return sorted(SeoMetadata.objects.values_list(
+            'path', 'lang_code', 'title', 'description', 'has_parameters',
+            'path_prefix', 'path_segments', 'content_type_id', 'object_id'))
+
+    def get_registered_values(self):
+        return sorted(SeoRegisteredModel.objects.values_list(
+            'content_type_id', 'lang_code', 'title', 'description'))
+
+    def export(self, rows, fields, format):
+        stream = StringIO()
+        write_rows(stream, rows, fields, format)
+        return stream.getvalue()
+
+    def test_round_trip(self):
+        metadata_values = self.get_metadata_values()
+        registered_values = self.get_registered_values()
+        for format in FORMATS:
+            metadata = self.export(iter_metadata_rows(), METADATA_FIELDS, format)
+            registered = self.export(iter_registered_rows(), REGISTERED_FIELDS, format)
+            SeoMetadata.objects.all().delete()
+            SeoRegisteredModel.objects.all().delete()
+
+            result = import_rows(SeoMetadata, read_rows(StringIO(metadata), format))
+            self.assertEqual(result, {'rows': 3, 'created': 3, 'updated': 0, 'errors': 0})
+            result = import_rows(
+                SeoRegisteredModel, read_rows(StringIO(registered), format))
+            self.assertEqual(result, {'rows': 1, 'created': 1, 'updated': 0, 'errors': 0})
+            self.assertEqual(self.get_metadata_values(), metadata_values, format)
+            self.assertEqual(self.get_registered_values(), registered_values, format)
+
+    def test_import_again_changes_nothing(self):
+        metadata_values = self.get_metadata_values()
+        for format in FORMATS:
+            metadata = self.export(iter_metadata_rows(), METADATA_FIELDS, format)
+            result = import_rows(SeoMetadata, read_rows(StringIO(metadata), format))
+            self.assertEqual(result, {'rows': 3, 'created': 0, 'updated': 0, 'errors': 0})
+        self.assertEqual(self.get_metadata_values(), metadata_values)
+
+    def test_import_invalidates_caches(self):
+        self.assertEqual(get_path_metadata('/section/slug/', LANG_CODE)['title'], 'Section Slug')
+        self.assertNotEqual(get_path_metadata('/new/', LANG_CODE)['title'], 'New')
+        rows = 'path,lang_code,title,description\n' \
+            '/section/{0}/,%(lang)s,Changed {0},D\n/new/,%(lang)s,New,D\n' % {'lang': LANG_CODE}
+        import_rows(SeoMetadata, read_rows(StringIO(rows), 'csv'))
+        self.assertEqual(get_path_metadata('/section/slug/', LANG_CODE)['title'], 'Changed Slug')
+        self.assertEqual(get_path_metadata('/new/', LANG_CODE)['title'], 'New')
+
+    def test_invalid_rows(self):
+        errors = []
+        rows = '{"path": "relative", "lang_code": "%s", "title": "T", "description": "D"}\n' \
+            '[1, 2]\nnot json\n' % LANG_CODE
+        result = import_rows(
+            SeoMetadata, read_rows(StringIO(rows), 'jsonl'),
+            on_error=lambda line_number, message: errors.append(line_number))
+        self.assertEqual(result, {'rows': 3, 'created': 0, 'updated': 0, 'errors': 3})
+        self.assertEqual(errors, [1, 2, 3])
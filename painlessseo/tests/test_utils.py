@@ -0,0 +1,159 @@
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import hashlib
+import zlib
+
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from painlessseo.models import SeoMetadata
+from painlessseo.tests.base import (
+    LANG_CODE, SeoTestCase, clear_caches, override_seo_settings
+    )
+from painlessseo.tests.testapp.models import Article
+from painlessseo.utils import (
+    deferred_seo_updates, deferred_updates, get_fallback_metadata, get_path_hash,
+    get_path_metadata, get_path_metadata_many
+    )
+
+
+class FallbackTest(SeoTestCase):
+
+    def test_rotation(self):
+        titles = [get_fallback_metadata(LANG_CODE, index)['title'] for index in range(3)]
+        self.assertEqual(titles, ['Default title', 'Another default title', 'Default title'])
+        self.assertEqual(get_fallback_metadata(LANG_CODE, 1)['description'], 'Default description')
+        self.assertEqual(get_fallback_metadata('es', 1), {'title': 'Titulo', 'description': 'Descripcion'})
+
+    def test_default_language(self):
+        self.assertEqual(get_fallback_metadata('fr', 1), get_fallback_metadata(LANG_CODE, 1))
+
+    def test_md5_hash(self):
+        # Same titles for the same paths as previous versions
+        self.assertEqual(get_path_hash('/page/'), int(hashlib.md5('/page/').hexdigest(), 16))
+        self.assertEqual(get_path_hash(u'/p\xe1gina/'), int(hashlib.md5('/p\xc3\xa1gina/').hexdigest(), 16))
+
+    def test_crc32_hash(self):
+        with override_seo_settings(PATH_HASH='crc32'):
+            self.assertEqual(get_path_hash('/page/'), zlib.crc32('/page/') & 0xffffffff)
+            self.assertTrue(get_path_hash('/other/') >= 0)
+
+    def test_path_fallback(self):
+        for path in ('/first/', '/second/', '/third/'):
+            self.assertEqual(
+                get_path_metadata(path, LANG_CODE),
+                get_fallback_metadata(LANG_CODE, get_path_hash(path)))
+
+
+class GetPathMetadataManyTest(SeoTestCase):
+
+    def setUp(self):
+        super(GetPathMetadataManyTest, self).setUp()
+        self.article = Article.objects.create(slug='many', name='Many')
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title='Exact', description='Description')
+        SeoMetadata.objects.create(
+            path='/exact/', lang_code=LANG_CODE, title='Duplicated', description='Description')
+        SeoMetadata.objects.create(
+            path='/section/{0}/', lang_code=LANG_CODE, has_parameters=True,
+            title='Section {0}', description='Description {0}')
+        SeoMetadata.objects.create(
+            path=self.article.get_absolute_url(), lang_code=LANG_CODE,
+            content_object=self.article, title='Article {name}', description='Description')
+
+    def test_same_order_and_values(self):
+        items = [
+            ('/section/first-one/', None),
+            ('/unmatched/', None),
+            ('/exact/', None),
+            (self.article.get_absolute_url(), None),
+            ('/section/second/', None),
+            ('/unmatched/', self.article),
+            ('/exact/', None),
+            ]
+        results = get_path_metadata_many(items, LANG_CODE, seo_context={})
+        self.assertEqual(len(results), len(items))
+        for (path, instance), result in zip(items, results):
+            clear_caches()
+            self.assertEqual(result, get_path_metadata(path, LANG_CODE, instance, {}), path)
+        self.assertEqual(
+            [result['title'] for result in results[:5]],
+            ['Section First One', results[1]['title'], 'Exact', 'Article Many', 'Section Second'])
+
+    def test_queries_do_not_depend_on_items(self):
+        items = [('/exact/%d/' % index, None) for index in range(50)]
+        get_path_metadata_many(items[:1], LANG_CODE)
+        clear_caches()
+        with self.assertNumQueries(2):
+            # Exact paths at once, then the parameterized index
+            get_path_metadata_many(items, LANG_CODE)
+
+
+class DeferredUpdatesTestMixin(object):
+
+    def setUp(self):
+        super(DeferredUpdatesTestMixin, self).setUp()
+        self.article = Article.objects.create(slug='old', name='Article')
+        self.seometadata = SeoMetadata.objects.create(
+            path='/articles/old/', lang_code=LANG_CODE, content_object=self.article,
+            title='Article', description='Description')
+
+    def tearDown(self):
+        deferred_updates.queue = {}
+        super(DeferredUpdatesTestMixin, self).tearDown()
+
+    def get_path(self):
+        return SeoMetadata.objects.get(pk=self.seometadata.pk).path
+
+    def rename(self, slug):
+        self.article.slug = slug
+        self.article.save()
+
+
+class DeferredSeoUpdatesTest(DeferredUpdatesTestMixin, SeoTestCase):
+
+    def test_immediate_without_block(self):
+        self.rename('new')
+        self.assertEqual(self.get_path(), '/articles/new/')
+
+    def test_run_when_block_exits(self):
+        with deferred_seo_updates():
+            self.rename('new')
+            self.assertEqual(self.get_path(), '/articles/old/')
+        self.assertEqual(self.get_path(), '/articles/new/')
+        self.assertEqual(deferred_updates.queue, {})
+
+    def test_nested_blocks_run_once(self):
+        with deferred_seo_updates():
+            with deferred_seo_updates():
+                self.rename('inner')
+            self.assertEqual(self.get_path(), '/articles/old/')
+            self.rename('outer')
+        self.assertEqual(self.get_path(), '/articles/outer/')
+
+    def test_dropped_on_exception_in_transaction(self):
+        try:
+            with transaction.atomic():
+                with deferred_seo_updates():
+                    self.rename('new')
+                    raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(deferred_updates.queue, {})
+        self.assertEqual(self.get_path(), '/articles/old/')
+
+
+class DeferredSeoUpdatesCommittedTest(DeferredUpdatesTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        clear_caches()
+        super(DeferredSeoUpdatesCommittedTest, self).setUp()
+
+    def test_run_on_exception_outside_transaction(self):
+        with self.assertRaises(ValueError):
+            with deferred_seo_updates():
+                self.rename('new')
+                raise ValueError
+        # The article was saved, so its path is updated
+        self.assertEqual(self.get_path(), '/articles/new/')
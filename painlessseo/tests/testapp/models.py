@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.core.urlresolvers import reverse
+from django.db import models
+
+
+class Author(models.Model):
+    username = models.CharField(max_length=50)
+
+
+class Article(models.Model):
+    slug = models.CharField(max_length=50)
+    name = models.CharField(max_length=100)
+    name_es = models.CharField(max_length=100, blank=True)
+    author = models.ForeignKey(Author, null=True, blank=True)
+
+    DEFAULT_SEO_TITLES = {'en': '{name} by {author.username}', 'es': '{name} de {author.username}'}
+    DEFAULT_SEO_DESCRIPTIONS = {'en': 'All about {name}', 'es': 'Todo sobre {name}'}
+
+    def get_absolute_url(self):
+        return reverse('article', args=[self.slug])
+
+
+class Tag(models.Model):
+    # Not an integer primary key
+    name = models.CharField(max_length=50, primary_key=True)
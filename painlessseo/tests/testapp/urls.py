@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+from django.conf.urls import include, url
+from django.contrib import admin
+from django.http import HttpResponse
+
+# Registers the painlessseo admin on django < 1.7
+admin.autodiscover()
+
+urlpatterns = [
+    url(r'^articles/(?P<slug>[\w-]+)/$', lambda request, slug: HttpResponse(slug), name='article'),
+    url(r'^admin/', include(admin.site.urls)),
+]
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+
+import csv
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.encoding import smart_str, smart_text
+
+from painlessseo import settings
+from painlessseo.cache import (
+    metadata_cache, registered_metadata, local_caches, unmatched_paths
+    )
+from painlessseo.formatting import PLACEHOLDER_RE
+from painlessseo.fragments import fragments
+from painlessseo.matcher import path_index
+from painlessseo.materialized import materialized
+from painlessseo.models import SeoMetadata, SeoRegisteredModel
+from painlessseo.paths import PARAMETER_RE
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 1000
+
+METADATA_FIELDS = ('path', 'lang_code', 'title', 'description', 'content_type', 'object_id')
+REGISTERED_FIELDS = ('content_type', 'lang_code', 'title', 'description')
+
+
+def get_format(filename, format=None):
+    if format is None:
+        format = 'jsonl' if filename.endswith(('.jsonl', '.json')) else 'csv'
+    if format not in FORMATS:
+        raise ValueError("Unknown format '%s', use one of: %s." % (format, ', '.join(FORMATS)))
+    return format
+
+
+def get_content_type_label(content_type_id):
+    if content_type_id is None:
+        return ''
+    ctype = ContentType.objects.get_for_id(content_type_id)
+    return '%s.%s' % (ctype.app_label, ctype.model)
+
+
+def get_content_type_id(label):
+    if not label:
+        return None
+    try:
+        app_label, model = label.lower().split('.', 1)
+        return ContentType.objects.get_by_natural_key(app_label, model).id
+    except (ValueError, ContentType.DoesNotExist):
+        raise ValidationError("Unknown model '%s', expected 'app_label.model'." % label)
+
+
+def iter_values(queryset, fields, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Yields the values_list tuples of the queryset ordered by id, loading
+    chunk_size rows at a time.
+    """
+    queryset = queryset.order_by('id')
+    last_id = None
+    while True:
+        chunk_queryset = queryset
+        if last_id is not None:
+            chunk_queryset = queryset.filter(id__gt=last_id)
+        chunk = list(chunk_queryset.values_list('id', *fields)[:chunk_size])
+        if not chunk:
+            break
+        for values in chunk:
+            yield values[1:]
+        last_id = chunk[-1][0]
+
+
+def iter_metadata_rows(chunk_size=DEFAULT_BATCH_SIZE):
+    fields = ('path', 'lang_code', 'title', 'description', 'content_type_id', 'object_id')
+    for path, lang_code, title, description, content_type_id, object_id in iter_values(
+            SeoMetadata.objects.all(), fields, chunk_size):
+        yield {
+            'path': path,
+            'lang_code': lang_code,
+            'title': title,
+            'description': description,
+            'content_type': get_content_type_label(content_type_id),
+            'object_id': object_id,
+            }
+
+
+def iter_registered_rows(chunk_size=DEFAULT_BATCH_SIZE):
+    fields = ('content_type_id', 'lang_code', 'title', 'description')
+    for content_type_id, lang_code, title, description in iter_values(
+            SeoRegisteredModel.objects.all(), fields, chunk_size):
+        yield {
+            'content_type': get_content_type_label(content_type_id),
+            'lang_code': lang_code,
+            'title': title,
+            'description': description,
+            }
+
+
+def write_rows(stream, rows, fields, format='csv'):
+    """
+    Writes the row dicts to the stream one by one. Returns the number of
+    rows written.
+    """
+    count = 0
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([
+                '' if row[field] is None else smart_str(row[field])
+                for field in fields])
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(row, sort_keys=True) + '\n')
+            count += 1
+    return count
+
+
+def read_rows(stream, format='csv'):
+    """
+    Yields (line_number, row) tuples read from the stream, with the row
+    as a dict of unicode values (or None for empty CSV cells).
+    """
+    if format == 'csv':
+        reader = csv.reader(stream)
+        header = None
+        for values in reader:
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if not values:
+                continue
+            yield reader.line_num, dict(
+                (field, smart_text(value) if value != '' else None)
+                for field, value in zip(header, values))
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, ValidationError("Invalid JSON: %s" % e)
+                continue
+            if not isinstance(row, dict):
+                yield line_number, ValidationError("Expected a JSON object.")
+                continue
+            yield line_number, row
+
+
+def validate_placeholders(value, params_count):
+    for match in PLACEHOLDER_RE.finditer(value or ''):
+        name = match.group(1)
+        if name.isdigit() and int(name) >= params_count:
+            raise ValidationError(
+                "Placeholder %s does not match any of the %d path parameters." % (
+                    match.group(0), params_count))
+
+
+def clean_lang_code(row):
+    lang_code = (row.get('lang_code') or '').strip()
+    if lang_code not in dict(settings.SEO_LANGUAGES):
+        raise ValidationError("Unknown language '%s'." % lang_code)
+    return lang_code
+
+
+def clean_text(row, field, max_length, required=False):
+    value = row.get(field)
+    if value is not None:
+        value = smart_text(value).strip()
+    if required and not value:
+        raise ValidationError("Missing %s." % field)
+    if value and len(value) > max_length:
+        raise ValidationError("%s longer than %d characters." % (field.capitalize(), max_length))
+    return value
+
+
+def clean_metadata_row(row):
+    """
+    Validates a SeoMetadata row, returning the field values to store.
+    """
+    path = clean_text(row, 'path', 200, required=True)
+    if not path.startswith('/'):
+        raise ValidationError("Path '%s' must be absolute." % path)
+
+    values = {
+        'path': path,
+        'lang_code': clean_lang_code(row),
+        'title': clean_text(row, 'title', 100, required=True),
+        'description': clean_text(row, 'description', 200, required=True),
+        'has_parameters': bool(PARAMETER_RE.search(path)),
+        'content_type_id': get_content_type_id(row.get('content_type')),
+        'object_id': None,
+        }
+
+    params_count = len(PARAMETER_RE.findall(path))
+    validate_placeholders(values['title'], params_count)
+    validate_placeholders(values['description'], params_count)
+
+    object_id = row.get('object_id')
+    if object_id not in (None, ''):
+        try:
+            values['object_id'] = int(object_id)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid object_id '%s'." % object_id)
+    if (values['content_type_id'] is None) != (values['object_id'] is None):
+        raise ValidationError("content_type and object_id must be given together.")
+    return values
+
+
+def clean_registered_row(row):
+    """
+    Validates a SeoRegisteredModel row, returning the field values to store.
+    """
+    values = {
+        'content_type_id': get_content_type_id(row.get('content_type')),
+        'lang_code': clean_lang_code(row),
+        'title': clean_text(row, 'title', 100),
+        'description': clean_text(row, 'description', 200),
+        }
+    if values['content_type_id'] is None:
+        raise ValidationError("Missing content_type.")
+    # There are no path parameters for model defaults
+    validate_placeholders(values['title'], 0)
+    validate_placeholders(values['description'], 0)
+    return values
+
+
+def import_metadata_batch(batch):
+    """
+    Creates or updates the SeoMetadata of a dict of values by
+    (path, lang_code). The oldest SeoMetadata with the same path and
+    language is the one updated. Returns (created, updated) counts.
+    """
+    compared = ('title', 'description', 'has_parameters', 'content_type_id', 'object_id')
+    existing = {}
+    sms = SeoMetadata.objects.filter(
+        path__in=list(set([path for path, lang_code in batch])),
+        lang_code__in=list(set([lang_code for path, lang_code in batch])),
+        ).order_by('-id').values_list('id', 'path', 'lang_code', *compared)
+    for sm in sms:
+        existing[(sm[1], sm[2])] = (sm[0], sm[3:])
+
+    to_create = []
+    to_update = []
+    for key, values in batch.iteritems():
+        current = existing.get(key)
+        if current is None:
+            sm = SeoMetadata(**values)
+            # bulk_create does not call save
+            sm.update_path_fields()
+            to_create.append(sm)
+        elif current[1] != tuple([values[field] for field in compared]):
+            update_values = dict((field, values[field]) for field in compared)
+            # Old django versions only accept field names in update()
+            update_values['content_type'] = update_values.pop('content_type_id')
+            to_update.append((current[0], update_values))
+
+    with transaction.atomic():
+        SeoMetadata.objects.bulk_create(to_create)
+        for sm_id, values in to_update:
+            SeoMetadata.objects.filter(id=sm_id).update(**values)
+    return len(to_create), len(to_update)
+
+
+def import_registered_batch(batch):
+    """
+    Creates the SeoRegisteredModel of a dict of values by
+    (content_type_id, lang_code, title, description) not existing yet.
+    Returns (created, updated) counts.
+    """
+    existing = set(SeoRegisteredModel.objects.filter(
+        content_type_id__in=list(set([key[0] for key in batch])),
+        ).values_list('content_type_id', 'lang_code', 'title', 'description'))
+
+    to_create = [
+        SeoRegisteredModel(**values)
+        for key, values in batch.iteritems() if key not in existing]
+    with transaction.atomic():
+        SeoRegisteredModel.objects.bulk_create(to_create)
+    return len(to_create), 0
+
+
+def import_rows(model_class, rows, batch_size=DEFAULT_BATCH_SIZE,
+                on_error=None, on_batch=None):
+    """
+    Imports (line_number, row) tuples, as yielded by read_rows, into
+    SeoMetadata or SeoRegisteredModel, in batches of batch_size rows, each
+    one written in its own transaction.
+
+    Invalid rows are skipped and passed to on_error(line_number, message).
+    on_batch(result) is called after every batch. Returns a dict with the
+    number of 'rows', 'created', 'updated' and 'errors'.
+    """
+    if model_class is SeoMetadata:
+        clean_row, import_batch = clean_metadata_row, import_metadata_batch
+
+        def make_key(values):
+            return (values['path'], values['lang_code'])
+    else:
+        clean_row, import_batch = clean_registered_row, import_registered_batch
+
+        def make_key(values):
+            return (values['content_type_id'], values['lang_code'],
+                    values['title'], values['description'])
+
+    result = {'rows': 0, 'created': 0, 'updated': 0, 'errors': 0}
+
+    def flush(batch):
+        created, updated = import_batch(batch)
+        result['created'] += created
+        result['updated'] += updated
+        if on_batch is not None:
+            on_batch(result)
+
+    batch = {}
+    for line_number, row in rows:
+        result['rows'] += 1
+        try:
+            if isinstance(row, ValidationError):
+                raise row
+            values = clean_row(row)
+        except ValidationError as e:
+            result['errors'] += 1
+            if on_error is not None:
+                on_error(line_number, '; '.join(e.messages))
+            continue
+
+        # The last row for the same key wins
+        batch[make_key(values)] = values
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = {}
+    if batch:
+        flush(batch)
+
+    if result['created'] or result['updated']:
+        # Bulk operations do not send signals
+        path_index.invalidate()
+        metadata_cache.invalidate()
+        registered_metadata.invalidate()
+        materialized.invalidate()
+        fragments.invalidate()
+        unmatched_paths.clear()
+        local_caches.broadcast()
+    return result
@@ -1,217 +1,613 @@
 # -*- coding: utf-8 -*-
 from painlessseo import settings
 from painlessseo.models import SeoMetadata
-from django.core.exceptions import ImproperlyConfigured
+from painlessseo.matcher import path_index, MetadataRecord, get_record_queryset
+from painlessseo.cache import (
+    metadata_cache, registered_metadata, local_caches, unmatched_paths,
+    batch_invalidations, invalidate_later
+    )
+from painlessseo.formatting import PLACEHOLDER_RE, compile_template
+from painlessseo.materialized import materialized
+from painlessseo.fragments import fragments
+from painlessseo.instrumentation import measure, set_branch
+from painlessseo.paths import get_path_prefix, get_path_segments
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 from django.utils.translation import activate, get_language
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
-from django.db.models import Q
-from django.forms.models import model_to_dict
-from django.core.urlresolvers import resolve
-from painlessseo.models import SeoRegisteredModel
-from django.utils.encoding import smart_text, smart_str
-
-import re
+from django.db import connection, models, transaction
+from django.utils.encoding import smart_str
+from django.utils import six
+
+try:
+    from django.apps import apps
+    get_model = apps.get_model
+except ImportError:
+    # Django < 1.7
+    get_model = models.get_model
+
+import logging
+import sys
 import hashlib
+import threading
+import zlib
+from contextlib import contextmanager
+
+logger = logging.getLogger('painlessseo')
+
+# Max number of paths in a single 'path__in' query
+PATH_BATCH_SIZE = 500
+
+# Max number of instances synced at once by deferred updates
+DEFERRED_BATCH_SIZE = 1000
+
+
+def get_fallback_values(values, lang_code):
+    # Values may be a dict by language, each one either a string or a list
+    if isinstance(values, dict):
+        if lang_code not in values:
+            lang_code = settings.DEFAULT_LANG_CODE
+        values = values[lang_code]
+    if isinstance(values, (list, tuple)):
+        return tuple(values)
+    return (values, )
+
+
+def build_fallback_metadata(lang_code):
+    """
+    Returns a (titles, descriptions) tuple with all the fallback values
+    defined in settings for the language.
+    """
+    return (
+        get_fallback_values(settings.FALLBACK_TITLE, lang_code),
+        get_fallback_values(settings.FALLBACK_DESCRIPTION, lang_code),
+        )
+
+
+# Computed once for every language on first use, see get_fallback_metadata
+fallback_metadata = {}
 
 
 def get_fallback_metadata(lang_code, index=0):
-    titles = settings.FALLBACK_TITLE
-    descriptions = settings.FALLBACK_DESCRIPTION
-    lang = lang_code
-    if isinstance(titles, dict):
-        if lang_code not in titles:
-            lang = settings.DEFAULT_LANG_CODE
-        title = titles[lang]
-        if isinstance(title, list):
-            title = title[index % len(title)]
-
-    if isinstance(descriptions, dict):
-        if lang_code not in descriptions:
-            lang = settings.DEFAULT_LANG_CODE
-        description = descriptions[lang]
-        if isinstance(description, list):
-            description = description[index % len(description)]
+    try:
+        titles, descriptions = fallback_metadata[lang_code]
+    except KeyError:
+        titles, descriptions = fallback_metadata.setdefault(
+            lang_code, build_fallback_metadata(lang_code))
 
     return {
-        'title': title,
-        'description': description,
+        'title': titles[index % len(titles)],
+        'description': descriptions[index % len(descriptions)],
         }
 
 
+def get_path_hash(path):
+    """
+    Returns a stable integer hash of the path, used to choose between
+    several titles or descriptions available for the same path.
+    """
+    if settings.PATH_HASH == 'md5':
+        return int(hashlib.md5(smart_str(path)).hexdigest(), 16)
+    return zlib.crc32(smart_str(path)) & 0xffffffff
+
+
 def get_instance_metadata(instance, lang_code):
     if instance:
         ctype = ContentType.objects.get_for_model(instance)
-        available_metadata = SeoRegisteredModel.objects.filter(
-            content_type=ctype, lang_code=lang_code).order_by('id')
+        available_metadata = registered_metadata.get(ctype.id, lang_code)
 
-        if available_metadata.exists():
-            total = available_metadata.count()
+        if available_metadata:
+            total = len(available_metadata)
             index = 0
             if hasattr(instance, 'id'):
                 index = instance.id % total
             elif hasattr(instance, 'pk'):
                 index = instance.pk % total
 
+            title, description = available_metadata[index]
             return {
-                'title': available_metadata[index].title,
-                'description': available_metadata[index].description,
+                'title': title,
+                'description': description,
             }
 
 
-def format_metadata(result, instance=None, lang_code=None, path_args=[], seo_context={}):
+def format_metadata(result, instance=None, lang_code=None, path_args=(), seo_context=None):
+    params = seo_context
+    if path_args:
+        # Path parameters take precedence, without changing the given context
+        params = dict(seo_context or {})
+        for index, path_arg in enumerate(path_args):
+            params[str(index)] = path_arg
+
     formatted_metadata = {}
-    path_context = {}
-    for index in range(0, len(path_args)):
-        path_context[str(index)] = path_args[index]
-    seo_context.update(path_context)
     for meta_key, meta_value in result.iteritems():
-        # First format using the instance
-        instance_string = format_from_instance(
-            string=meta_value,
+        # Format using the instance first, then using the context
+        formatted_metadata[meta_key] = compile_template(meta_value).render(
             instance=instance,
-            lang_code=lang_code)
-        # Then format using the context
-        formatted_metadata[meta_key] = format_from_params(
-            string=instance_string,
-            **seo_context)
+            lang_code=lang_code,
+            params=params)
 
     return formatted_metadata
 
 
 def format_from_params(string, **kwargs):
     # Format using parameters
-    result = string
-    if kwargs:
-        for name, value in kwargs.iteritems():
-            value = re.sub('-', ' ', smart_text(value)).title()
-            result = re.sub(
-                r'\{\s*%s\s*\}' % (name), value, result)
-
-    return result
+    return compile_template(string).render(params=kwargs)
 
 
 def format_from_instance(string, instance=None, lang_code=None):
     # Now substitute parameters {XX} by instance.XX (only for instance based
-    result = string
-    if instance and lang_code:
-        matches = re.findall(r"\{\s*([^\}\s]+)\s*\}", string)
-        if matches:
-            for match in matches:
-                # For each field, check if exists the one for the language
-                attrs = match.split('.')
-                base = instance
-                found = True
-                for attr in attrs:
-                    field_lang = "%s_%s" % (attr, lang_code)
-                    if hasattr(base, field_lang):
-                        attr_name = field_lang
-                    elif hasattr(base, attr):
-                        attr_name = attr
-                    elif base is None:
-                        # In case is a foreign key with 'None' value
-                        # We can't go deeper, but we found the attr
-                        attr_value = None
-                        break
-                    else:
-                        # Attr not found, so let it like it is
-                        found = False
-                        break
-
-                    attr_value = getattr(base, attr_name)
-                    if hasattr(attr_value, 'get'):
-                        base = attr_value.get()
-                    else:
-                        base = attr_value
-
-                if found:
-                    result = re.sub(
-                        r"\{\s*%s\s*\}" % match,
-                        unicode(attr_value or ''),
-                        result)
-    return result
-
-
-def get_path_metadata(path, lang_code, instance=None, seo_context={}):
-    # By default, fallback to general default
-    index = int(hashlib.md5(smart_str(path)).hexdigest(), 16)
-    result = get_fallback_metadata(lang_code, index=index)
+    return compile_template(string).render(
+        instance=instance, lang_code=lang_code)
 
-    # Find correct metadata
-    seometadata = None
-    path_args = []
 
-    try:
-        # Try to find exact match
-        seometadata = SeoMetadata.objects.get(
-            path=path, lang_code=lang_code)
-
-    except SeoMetadata.DoesNotExist:
-        # SeoMetadata not found, try to find an alternative path
-        abstract_seometadatas = SeoMetadata.objects.filter(
-            lang_code=lang_code, has_parameters=True,
-            ).order_by('id')
-        matches = []
-
-        # Collect all metadatas that matches the path
-        for abs_seometadata in list(abstract_seometadatas):
-            regex_path = re.sub(r'\{\d+\}', r'([\w\d\-]+)', abs_seometadata.path)
-            regex_path = '^' + regex_path + '/?$'
-            match = re.search(regex_path, path)
-            if match:
-                matches.append({
-                    'seometadata': abs_seometadata,
-                    'groups': match.groups(),
-                    })
-
-        if len(matches) > 0:
-            random_match = matches[index % len(matches)]
-            seometadata = random_match['seometadata']
-            path_args = random_match['groups']
+def match_path_metadata(path, lang_code, index):
+    """
+    Returns a (seometadata, path_args) tuple with the parameterized
+    SeoMetadata matching the path, or (None, ()) if there is none.
+    """
+    # Collect all metadatas that matches the path
+    matches = path_index.match(path, lang_code)
+
+    if len(matches) > 0:
+        return matches[index % len(matches)]
+    return None, ()
+
+
+def make_resolved_metadata(seometadata, path_args, lang_code, index, instance=None):
+    # By default, fallback to general default
+    result = get_fallback_metadata(lang_code, index=index)
+    content_type_id = None
+    object_id = None
+    branch = 'fallback'
 
     if seometadata:
         # If seometadata found
         result = seometadata.get_metadata()
-        instance = seometadata.content_object or instance
+        content_type_id = seometadata.content_type_id
+        object_id = seometadata.object_id
+        branch = 'parameterized' if seometadata.has_parameters else 'exact'
 
     else:
         # No exact nor abstract seo metadata found, prepare default
         if instance:
             # Look for registered model default
-            result = get_instance_metadata(instance, lang_code) or result
+            instance_result = get_instance_metadata(instance, lang_code)
+            if instance_result:
+                result = instance_result
+                branch = 'registered_model'
 
-    # At this point, result contains the resolved value before formatting.
-    formatted_result = format_metadata(result, instance, lang_code, path_args, seo_context)
+    return {
+        'metadata': result,
+        'path_args': tuple(path_args),
+        'content_type_id': content_type_id,
+        'object_id': object_id,
+        'branch': branch,
+        }
 
-    return formatted_result
 
+def get_exact_metadata(path, lang_code):
+    """
+    Returns a MetadataRecord of the SeoMetadata with the given path, or
+    None if there is none. If the path is duplicated, the oldest one.
+    """
+    rows = get_record_queryset().filter(path=path, lang_code=lang_code)[:1]
+    for row in rows:
+        return MetadataRecord(*row)
+    return None
 
-def update_seo(sender, instance, auto_languages=[], **kwargs):
-    active_lang = get_language()
 
-    for lang_code, lang_name in settings.SEO_LANGUAGES:
-        activate(lang_code)
-        ctype = ContentType.objects.get_for_model(instance)
+def uses_instance(metadata):
+    # Values without placeholders are formatted without the instance
+    for value in metadata.values():
+        if compile_template(value).names:
+            return True
+    return False
+
+
+def resolve_path_metadata(path, lang_code, instance=None):
+    """
+    Finds the metadata for the given path, without formatting it. Returns
+    a dict with the raw 'metadata', the 'path_args' captured by a
+    parameterized path, and the content object of the SeoMetadata found
+    (as 'content_type_id' and 'object_id').
+    """
+    index = get_path_hash(path)
 
-        sms = SeoMetadata.objects.filter(
-            content_type=ctype,
-            object_id=instance.id,
-            lang_code=lang_code)
-
-        if sms.exists():
-            # If it exists, update path
-            absolute_url = instance.get_absolute_url()
-            for sm in sms.all():
-                if absolute_url and absolute_url != sm.path:
-                    sm.path = absolute_url
-                    sm.save()
+    if unmatched_paths.get((path, lang_code)):
+        # Known to have no SeoMetadata, go straight to the fallbacks
+        seometadata, path_args = None, ()
+
+    else:
+        # Try to find exact match
+        seometadata = get_exact_metadata(path, lang_code)
+        path_args = ()
+
+        if seometadata is None:
+            # SeoMetadata not found, try to find an alternative path
+            seometadata, path_args = match_path_metadata(path, lang_code, index)
+            if seometadata is None:
+                unmatched_paths.set((path, lang_code), True)
+
+    return make_resolved_metadata(
+        seometadata, path_args, lang_code, index, instance)
+
+
+def get_resolved_instance(resolved, instance=None):
+    """
+    Returns the instance used to format resolved metadata: the content
+    object of the SeoMetadata found, or the given instance otherwise.
+    """
+    content_type_id = resolved['content_type_id']
+    object_id = resolved['object_id']
+    if content_type_id is None or object_id is None:
+        return instance
+    if not uses_instance(resolved['metadata']):
+        # Do not load the content object if nothing needs it
+        return instance
+
+    if (instance is not None and instance.pk == object_id and
+            ContentType.objects.get_for_model(instance).id == content_type_id):
+        # Already got it, avoid the query
+        return instance
+
+    try:
+        ctype = ContentType.objects.get_for_id(content_type_id)
+        return ctype.get_object_for_this_type(pk=object_id) or instance
+    except ObjectDoesNotExist:
+        return instance
+
+
+def is_content_object(resolved, instance):
+    return (instance.pk == resolved['object_id'] and
+            ContentType.objects.get_for_model(instance).id == resolved['content_type_id'])
+
+
+def is_context_free(resolved, metadata, instance=None, seo_context=None):
+    """
+    Tells whether the metadata formatted from resolved metadata, using the
+    given instance and context, does not depend on the view: it comes from
+    an exact or parameterized SeoMetadata, has no placeholders left, and
+    they were replaced with path parameters or content object values.
+    """
+    if resolved['branch'] not in ('exact', 'parameterized'):
+        # Fallbacks depend on the instance shown by the view
+        return False
+    if not is_materializable(metadata):
+        return False
+
+    names = set()
+    for value in resolved['metadata'].values():
+        names.update(compile_template(value).names)
+    # Path parameters take precedence over the context
+    names.difference_update([str(index) for index in range(len(resolved['path_args']))])
+    if not names:
+        return True
+    if instance is not None and not is_content_object(resolved, instance):
+        return False
+    return not (seo_context and names.intersection(seo_context))
+
+
+def format_path_metadata(path, lang_code, instance=None, seo_context=None, context_free=False):
+    """
+    Same as get_path_metadata, but returns a (metadata, context_free)
+    tuple. If context_free is True, the second item tells whether the
+    metadata does not depend on the given instance and context (see
+    is_context_free); otherwise it is not computed and is None.
+    """
+    with measure('get_path_metadata', path, lang_code):
+        resolved = metadata_cache.get(path, lang_code, instance)
+        cached = resolved is not None
+        if not cached:
+            resolved = resolve_path_metadata(path, lang_code, instance)
+            metadata_cache.set(path, lang_code, resolved, instance)
+        set_branch(resolved.get('branch'), cached=cached)
+
+        # At this point, result contains the resolved value before formatting.
+        resolved_instance = get_resolved_instance(resolved, instance)
+        formatted_result = format_metadata(
+            resolved['metadata'], resolved_instance,
+            lang_code, resolved['path_args'], seo_context)
+
+    if not context_free:
+        return formatted_result, None
+    return formatted_result, is_context_free(
+        resolved, formatted_result, resolved_instance, seo_context)
+
+
+def get_path_metadata(path, lang_code, instance=None, seo_context=None):
+    return format_path_metadata(path, lang_code, instance, seo_context)[0]
+
+
+def get_context_free_metadata(path, lang_code):
+    """
+    Returns the formatted metadata of the path if it can be resolved
+    without the view: materialized metadata, or an exact or parameterized
+    SeoMetadata whose title and description have no placeholders left.
+    Returns None otherwise.
+    """
+    metadata = materialized.get(path, lang_code)
+    if metadata is not None:
+        return metadata
+
+    resolved = metadata_cache.get(path, lang_code)
+    if resolved is None:
+        resolved = resolve_path_metadata(path, lang_code)
+        metadata_cache.set(path, lang_code, resolved)
+    if resolved['branch'] not in ('exact', 'parameterized'):
+        # Fallbacks depend on the instance shown by the view
+        return None
+
+    instance = get_resolved_instance(resolved)
+    metadata = format_metadata(
+        resolved['metadata'], instance, lang_code, resolved['path_args'])
+    if not is_context_free(resolved, metadata, instance):
+        return None
+    return metadata
+
+
+class MetadataLookup(threading.Thread):
+    """
+    Runs get_context_free_metadata in a background thread, so the
+    lookup is done while the view is running.
+    """
+
+    def __init__(self, path, lang_code):
+        super(MetadataLookup, self).__init__(name='painlessseo-lookup')
+        self.daemon = True
+        self.path = path
+        self.lang_code = lang_code
+        self.metadata = None
+
+    def run(self):
+        try:
+            self.metadata = get_context_free_metadata(self.path, self.lang_code)
+        except Exception:
+            logger.exception('SEO lookup failed for %s (%s)', self.path, self.lang_code)
+        finally:
+            # Each thread opens its own database connection
+            connection.close()
+
+    def result(self, timeout=None):
+        """
+        Waits for the lookup to finish and returns the metadata found, or
+        None if there is none or it did not finish in time.
+        """
+        self.join(timeout)
+        if self.is_alive():
+            return None
+        return self.metadata
+
+
+def get_path_metadata_async(path, lang_code):
+    """
+    Starts looking up the metadata of the path in a background thread.
+    Returns a MetadataLookup, whose result() method waits for it.
+    """
+    lookup = MetadataLookup(path, lang_code)
+    lookup.start()
+    return lookup
+
+
+def get_content_objects(resolved_list, instances):
+    """
+    Loads the content objects of a list of resolved metadata with a single
+    query per content type. Returns a dict by (content_type_id, object_id).
+    """
+    content_objects = {}
+    object_ids = {}
+    for resolved, instance in zip(resolved_list, instances):
+        key = (resolved['content_type_id'], resolved['object_id'])
+        if key[0] is None or key[1] is None:
+            continue
+        if not uses_instance(resolved['metadata']):
+            continue
+        if (instance is not None and instance.pk == key[1] and
+                ContentType.objects.get_for_model(instance).id == key[0]):
+            # Already got it, avoid the query
+            content_objects[key] = instance
         else:
-            # If it does not exists, only create if it is from sync command
-            if lang_code in auto_languages:
-                absolute_url = instance.get_absolute_url()
+            object_ids.setdefault(key[0], set()).add(key[1])
+
+    for content_type_id, ids in object_ids.iteritems():
+        model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model_class is None:
+            continue
+        for pk, content_object in model_class._base_manager.in_bulk(list(ids)).iteritems():
+            content_objects[(content_type_id, pk)] = content_object
+
+    return content_objects
+
+
+def get_path_metadata_many(items, lang_code, seo_context=None):
+    """
+    Batch version of get_path_metadata for sitemaps, feeds or listings.
+    Items is a list of (path, instance) tuples, where instance may be None.
+
+    Exact matches for all the paths are loaded at once, so the number of
+    queries does not depend on the number of items. Returns the formatted
+    metadata of every item, in the same order.
+    """
+    # May be used outside requests, e.g. to build sitemaps
+    local_caches.check()
+
+    items = list(items)
+    resolved_list = [
+        metadata_cache.get(path, lang_code, instance)
+        for path, instance in items]
+
+    # Load the exact matches of all the paths not cached yet
+    exact = {}
+    paths = list(set([
+        path for (path, instance), resolved in zip(items, resolved_list)
+        if resolved is None and not unmatched_paths.get((path, lang_code))]))
+    for start in range(0, len(paths), PATH_BATCH_SIZE):
+        rows = get_record_queryset().filter(
+            lang_code=lang_code,
+            path__in=paths[start:start + PATH_BATCH_SIZE])
+        for row in rows:
+            # If the path is duplicated, keep the oldest one
+            if row[1] not in exact:
+                exact[row[1]] = MetadataRecord(*row)
+
+    for position, (path, instance) in enumerate(items):
+        if resolved_list[position] is not None:
+            continue
+        index = get_path_hash(path)
+        seometadata = exact.get(path)
+        path_args = ()
+        if seometadata is None and not unmatched_paths.get((path, lang_code)):
+            seometadata, path_args = match_path_metadata(path, lang_code, index)
+            if seometadata is None:
+                unmatched_paths.set((path, lang_code), True)
+        resolved = make_resolved_metadata(
+            seometadata, path_args, lang_code, index, instance)
+        metadata_cache.set(path, lang_code, resolved, instance)
+        resolved_list[position] = resolved
+
+    instances = [instance for path, instance in items]
+    content_objects = get_content_objects(resolved_list, instances)
+
+    results = []
+    for resolved, instance in zip(resolved_list, instances):
+        key = (resolved['content_type_id'], resolved['object_id'])
+        results.append(format_metadata(
+            resolved['metadata'],
+            content_objects.get(key) or instance,
+            lang_code, resolved['path_args'], seo_context))
+
+    return results
+
+
+def get_absolute_urls(instances, lang_codes=None, memo=None):
+    """
+    Returns a dict by (model, pk, lang_code) with the absolute url of each
+    instance in each language (all of them by default). Every language is
+    activated once for all the instances, and the active one is restored
+    at the end.
+
+    Urls found in memo are not computed again, and the ones computed are
+    added to it, so it can be shared by all the steps of a sync batch.
+    """
+    if lang_codes is None:
+        lang_codes = [lang_code for lang_code, lang_name in settings.SEO_LANGUAGES]
+    urls = memo if memo is not None else {}
+
+    active_lang = get_language()
+    try:
+        for lang_code in lang_codes:
+            activated = False
+            for instance in instances:
+                key = (instance.__class__, instance.pk, lang_code)
+                if key in urls:
+                    continue
+                if not activated:
+                    activate(lang_code)
+                    activated = True
+                urls[key] = instance.get_absolute_url()
+    finally:
+        activate(active_lang)
+    return urls
+
+
+def update_seo(sender, instance, auto_languages=[], absolute_urls=None, **kwargs):
+    # The shared caches are invalidated once for all the languages
+    with batch_invalidations():
+        _update_seo(instance, auto_languages, absolute_urls)
+
+
+def _update_seo(instance, auto_languages, absolute_urls):
+    ctype = ContentType.objects.get_for_model(instance)
+
+    existing = {}
+    for sm in SeoMetadata.objects.filter(content_type=ctype, object_id=instance.id):
+        existing.setdefault(sm.lang_code, []).append(sm)
+
+    # Only the languages to update or create need the path
+    lang_codes = [
+        lang_code for lang_code, lang_name in settings.SEO_LANGUAGES
+        if lang_code in existing or lang_code in auto_languages]
+    absolute_urls = get_absolute_urls([instance], lang_codes, absolute_urls)
+
+    stale = []
+    active_lang = get_language()
+    try:
+        for lang_code in lang_codes:
+            absolute_url = absolute_urls[(instance.__class__, instance.pk, lang_code)]
+            sms = existing.get(lang_code)
+            if sms:
+                # If it exists, update path
+                for sm in sms:
+                    if absolute_url and absolute_url != sm.path:
+                        stale.append((sm.path, lang_code))
+                        sm.path = absolute_url
+                        sm.save()
+            elif absolute_url:
+                # If it does not exists, only create if it is from sync command
+                activate(lang_code)
                 metadata = get_fallback_metadata(lang_code)
                 metadata = get_instance_metadata(instance, lang_code) or metadata
-                if absolute_url:
+                sm = SeoMetadata(
+                    content_type=ctype,
+                    object_id=instance.id,
+                    lang_code=lang_code,
+                    path=absolute_url,
+                    title=metadata["title"],
+                    description=metadata["description"])
+                sm.save()
+    finally:
+        activate(active_lang)
+
+    expire_seo_paths(stale)
+    materialize_seo([instance], absolute_urls)
+    expire_seo_fragments([instance], absolute_urls)
+
+
+def bulk_update_seo(model_class, instances, auto_languages=[], absolute_urls=None):
+    """
+    Same as calling update_seo for each one of the instances, but loading
+    their existing SeoMetadata at once and writing all the changes in a
+    single transaction using bulk operations.
+
+    Returns a (created, updated) tuple with the number of SeoMetadata
+    instances created and updated.
+    """
+    if not instances:
+        return 0, 0
+
+    ctype = ContentType.objects.get_for_model(model_class)
+    existing = {}
+    sms = SeoMetadata.objects.filter(
+        content_type=ctype,
+        object_id__in=[instance.id for instance in instances],
+        ).values_list('id', 'object_id', 'lang_code', 'path')
+    for sm_id, object_id, lang_code, path in sms:
+        existing.setdefault((object_id, lang_code), []).append((sm_id, path))
+
+    absolute_urls = get_absolute_urls(instances, memo=absolute_urls)
+
+    to_create = []
+    to_update = []
+    stale = []
+    active_lang = get_language()
+    try:
+        for lang_code, lang_name in settings.SEO_LANGUAGES:
+            activated = False
+            for instance in instances:
+                absolute_url = absolute_urls[(instance.__class__, instance.pk, lang_code)]
+                lang_sms = existing.get((instance.id, lang_code))
+                if lang_sms:
+                    # If it exists, update path
+                    for sm_id, path in lang_sms:
+                        if absolute_url and absolute_url != path:
+                            to_update.append((sm_id, absolute_url))
+                            stale.append((path, lang_code))
+                elif lang_code in auto_languages and absolute_url:
+                    # If it does not exists, only create if requested
+                    if not activated:
+                        activate(lang_code)
+                        activated = True
+                    metadata = get_fallback_metadata(lang_code)
+                    metadata = get_instance_metadata(instance, lang_code) or metadata
                     sm = SeoMetadata(
                         content_type=ctype,
                         object_id=instance.id,
@@ -219,21 +615,296 @@ def update_seo(sender, instance, auto_languages=[], **kwargs):
                         path=absolute_url,
                         title=metadata["title"],
                         description=metadata["description"])
-                    sm.save()
-
-    activate(active_lang)
+                    # bulk_create does not call save
+                    sm.update_path_fields()
+                    to_create.append(sm)
+    finally:
+        activate(active_lang)
+
+    if to_create or to_update:
+        with transaction.atomic():
+            SeoMetadata.objects.bulk_create(to_create)
+            for sm_id, path in to_update:
+                SeoMetadata.objects.filter(id=sm_id).update(
+                    path=path,
+                    path_prefix=get_path_prefix(path),
+                    path_segments=get_path_segments(path))
+
+        # Bulk operations do not send signals
+        path_index.invalidate()
+        unmatched_paths.clear()
+        invalidate_later(metadata_cache.invalidate)
+        invalidate_later(fragments.invalidate)
+        invalidate_later(local_caches.broadcast)
+
+    # Nor are the entries of the previous paths removed
+    expire_seo_paths(stale)
+    materialize_seo(instances, absolute_urls)
+    expire_seo_fragments(instances, absolute_urls)
+    return len(to_create), len(to_update)
+
+
+def is_materializable(metadata):
+    # Values still having placeholders depend on the request context
+    for value in metadata.values():
+        if value and PLACEHOLDER_RE.search(value):
+            return False
+    return True
+
+
+def materialize_seo(instances, absolute_urls=None):
+    """
+    Resolves and formats the metadata of the instances paths for every
+    language, and stores it in the materialized metadata table. Paths
+    whose metadata depends on the request context are removed instead.
+
+    Returns the number of entries stored.
+    """
+    if not materialized.enabled or not instances:
+        return 0
+
+    absolute_urls = get_absolute_urls(instances, memo=absolute_urls)
+    entries = {}
+    stale = []
+    active_lang = get_language()
+    try:
+        for lang_code, lang_name in settings.SEO_LANGUAGES:
+            activate(lang_code)
+            items = []
+            for instance in instances:
+                absolute_url = absolute_urls[(instance.__class__, instance.pk, lang_code)]
+                if absolute_url:
+                    items.append((absolute_url, instance))
+            results = get_path_metadata_many(items, lang_code)
+            for (path, instance), metadata in zip(items, results):
+                if is_materializable(metadata):
+                    entries[(path, lang_code)] = metadata
+                else:
+                    stale.append((path, lang_code))
+    finally:
+        activate(active_lang)
+
+    materialized.set_many(entries)
+    materialized.delete_many(stale)
+    return len(entries)
+
+
+def dematerialize_seo(instance):
+    """
+    Removes the materialized metadata of the instance paths.
+    """
+    if not materialized.enabled:
+        return
+
+    absolute_urls = get_absolute_urls([instance])
+    materialized.delete_many([
+        (absolute_urls[(instance.__class__, instance.pk, lang_code)], lang_code)
+        for lang_code, lang_name in settings.SEO_LANGUAGES
+        if absolute_urls[(instance.__class__, instance.pk, lang_code)]])
+
+
+def expire_seo_fragments(instances, absolute_urls=None):
+    """
+    Removes the rendered get_seo HTML of the instances paths, as their
+    metadata may be formatted with the changed instance values.
+    """
+    if not fragments.enabled or not instances:
+        return
+
+    absolute_urls = get_absolute_urls(instances, memo=absolute_urls)
+    fragments.delete_many([
+        (absolute_urls[(instance.__class__, instance.pk, lang_code)], lang_code)
+        for instance in instances
+        for lang_code, lang_name in settings.SEO_LANGUAGES
+        if absolute_urls[(instance.__class__, instance.pk, lang_code)]])
+
+
+def expire_seo_paths(paths):
+    """
+    Removes the materialized metadata and the rendered get_seo HTML of the
+    given (path, lang_code) pairs, when they are no longer the path of the
+    instance they were computed for.
+    """
+    if paths:
+        materialized.delete_many(paths)
+        fragments.delete_many(paths)
+
+
+# Attribute of SeoMetadata instances keeping the values they had before
+# being saved, see remember_materialized_path
+PREVIOUS_PATH_ATTR = '_painlessseo_previous_path'
+
+# Attribute of registered model instances keeping their absolute urls
+# before being saved, see remember_absolute_urls
+PREVIOUS_URLS_ATTR = '_painlessseo_previous_urls'
+
+
+def remember_materialized_path(sender, instance, **kwargs):
+    """
+    pre_save handler for SeoMetadata, so the entry of the previous path
+    can be deleted if it changes.
+    """
+    if not materialized.enabled or instance.pk is None:
+        return
+    previous = SeoMetadata.objects.filter(pk=instance.pk).values_list(
+        'path', 'lang_code', 'has_parameters')
+    setattr(instance, PREVIOUS_PATH_ATTR, previous[0] if previous else None)
+
+
+def remember_absolute_urls(sender, instance, raw=False, **kwargs):
+    """
+    pre_save handler for registered models, so the entries of their
+    previous paths can be removed if they change, even if they have no
+    SeoMetadata.
+    """
+    if not (materialized.enabled or fragments.enabled) or raw or instance.pk is None:
+        return
+    previous = sender._base_manager.filter(pk=instance.pk)[:1]
+    if previous:
+        setattr(instance, PREVIOUS_URLS_ATTR, get_absolute_urls(previous))
+
+
+def refresh_materialized(sender, instance, **kwargs):
+    """
+    post_save and post_delete handler for SeoMetadata.
+    """
+    if not materialized.enabled:
+        return
+
+    previous = getattr(instance, PREVIOUS_PATH_ATTR, None)
+    if previous is not None:
+        delattr(instance, PREVIOUS_PATH_ATTR)
+    if instance.has_parameters or (previous is not None and previous[2]):
+        # It may match (or have matched) the path of any instance
+        materialized.invalidate()
+        return
+
+    stale = [(instance.path, instance.lang_code)]
+    if previous is not None:
+        stale.append(previous[:2])
+    materialized.delete_many(stale)
+    content_object = instance.content_object
+    if content_object is not None and hasattr(content_object, 'get_absolute_url'):
+        materialize_seo([content_object])
+
+
+models.signals.pre_save.connect(
+    remember_materialized_path, sender=SeoMetadata,
+    dispatch_uid='painlessseo_remember_materialized_path')
+models.signals.post_save.connect(
+    refresh_materialized, sender=SeoMetadata,
+    dispatch_uid='painlessseo_refresh_materialized_save')
+models.signals.post_delete.connect(
+    refresh_materialized, sender=SeoMetadata,
+    dispatch_uid='painlessseo_refresh_materialized_delete')
+
+
+class DeferredUpdates(threading.local):
+    """
+    Per-thread state of the deferred update_seo calls: the number of
+    active deferred_seo_updates blocks and the queued instance ids.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.queue = {}
+
+
+deferred_updates = DeferredUpdates()
+
+
+def run_deferred_updates():
+    """
+    Runs update_seo for all the queued instances, in batches.
+    """
+    queue = deferred_updates.queue
+    deferred_updates.queue = {}
+    with batch_invalidations():
+        for model_class, ids in queue.iteritems():
+            # Reload them, some may have been changed or deleted since queued
+            instances = model_class._base_manager.in_bulk(list(ids)).values()
+            for start in range(0, len(instances), DEFERRED_BATCH_SIZE):
+                bulk_update_seo(model_class, instances[start:start + DEFERRED_BATCH_SIZE])
+
+
+@contextmanager
+def deferred_seo_updates():
+    """
+    Queues the SEO updates triggered by saving registered models inside
+    the block, and runs them in a single batched pass when it exits.
+    Nested blocks are merged with the outermost one.
+
+    If the block raises an exception inside a transaction, the queued
+    updates are dropped, as the transaction is going to be rolled back.
+    Otherwise the saves done are already committed, so they are run.
+    """
+    deferred_updates.depth += 1
+    try:
+        yield
+    except Exception:
+        exc_info = sys.exc_info()
+        deferred_updates.depth -= 1
+        if not deferred_updates.depth:
+            if connection.in_atomic_block:
+                deferred_updates.queue = {}
+            else:
+                try:
+                    run_deferred_updates()
+                except Exception:
+                    logger.exception('Deferred SEO updates failed')
+        six.reraise(*exc_info)
+    else:
+        deferred_updates.depth -= 1
+        if not deferred_updates.depth:
+            run_deferred_updates()
+
+
+def schedule_update_seo(sender, instance, **kwargs):
+    """
+    post_save handler for registered models. Calls update_seo right away,
+    unless inside a deferred_seo_updates block.
+    """
+    previous_urls = instance.__dict__.pop(PREVIOUS_URLS_ATTR, None)
+    absolute_urls = None
+    if previous_urls:
+        absolute_urls = get_absolute_urls([instance])
+        expire_seo_paths([
+            (url, key[2]) for key, url in previous_urls.items()
+            if url and url != absolute_urls.get(key)])
+
+    if deferred_updates.depth:
+        deferred_updates.queue.setdefault(sender, set()).add(instance.pk)
+    else:
+        update_seo(sender, instance, absolute_urls=absolute_urls, **kwargs)
 
 
 def delete_seo(sender, instance, **kwargs):
     ctype = ContentType.objects.get_for_model(instance)
-    for sm in SeoMetadata.objects.filter(content_type=ctype, object_id=instance.id):
-        sm.delete()
+    with batch_invalidations():
+        for sm in SeoMetadata.objects.filter(content_type=ctype, object_id=instance.id):
+            sm.delete()
+    dematerialize_seo(instance)
+    expire_seo_fragments([instance])
+
+
+def get_seo_model(app, model):
+    """
+    Returns the model class of a SEO_MODELS entry, without database access.
+    """
+    try:
+        model_class = get_model(app, model)
+    except LookupError:
+        model_class = None
+    if model_class is None:
+        raise ImproperlyConfigured("Model %s.%s defined in SEO_MODELS not found." % (app, model))
+    return model_class
 
 
 def register_seo_signals():
     for app, model in settings.SEO_MODELS:
-        ctype = ContentType.objects.get(app_label=app.lower(), model=model.lower())
-        if not hasattr(ctype.model_class(), 'get_absolute_url'):
+        model_class = get_seo_model(app, model)
+        if not hasattr(model_class, 'get_absolute_url'):
             raise ImproperlyConfigured("Needed get_absolute_url method not defined on %s.%s model." % (app, model))
-        models.signals.post_save.connect(update_seo, sender=ctype.model_class(), weak=False)
-        models.signals.pre_delete.connect(delete_seo, sender=ctype.model_class(), weak=False)
+        models.signals.pre_save.connect(remember_absolute_urls, sender=model_class, weak=False)
+        models.signals.post_save.connect(schedule_update_seo, sender=model_class, weak=False)
+        models.signals.pre_delete.connect(delete_seo, sender=model_class, weak=False)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2014 Glamping Hub (https://glampinghub.com)
+# License: BSD 3-Clause
+"""
+runtests.py
+
+    Runs the painlessseo tests with an in-memory SQLite database and the
+    painlessseo.tests.testapp models. Test labels can be given to run only
+    some of them.
+
+    $> python runtests.py [painlessseo.tests.test_cache]
+
+"""
+import os
+import sys
+
+
+def configure():
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY='painlessseo',
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'django.contrib.sessions',
+            'django.contrib.messages',
+            'django.contrib.admin',
+            'painlessseo',
+            'painlessseo.tests.testapp',
+        ],
+        MIDDLEWARE_CLASSES=[
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+        ],
+        TEMPLATE_CONTEXT_PROCESSORS=[
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+            'django.core.context_processors.request',
+        ],
+        ROOT_URLCONF='painlessseo.tests.testapp.urls',
+        USE_I18N=True,
+        LANGUAGE_CODE='en',
+        LANGUAGES=(('en', 'English'), ('es', 'Spanish')),
+        DEFAULT_SEO_TITLES={'en': ['Default title', 'Another default title'], 'es': 'Titulo'},
+        DEFAULT_SEO_DESCRIPTIONS={'en': 'Default description', 'es': 'Descripcion'},
+        SEO_MODELS=[('testapp', 'article')],
+    )
+    if hasattr(django, 'setup'):
+        django.setup()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    configure()
+
+    from django.conf import settings
+    from django.test.utils import get_runner
+
+    runner = get_runner(settings)(verbosity=1, interactive=False)
+    failures = runner.run_tests(argv or ['painlessseo'])
+    sys.exit(bool(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,7 +24,7 @@ setup(
     version='0.1.2',
     author='Glamping Hub',
     author_email='it@glampinghub.com',
-    packages=find_packages('.'),
+    packages=find_packages('.', exclude=['benchmarks', 'benchmarks.*', 'benchapp']),
     include_package_data=True,
     package_data={
         '': recursive_include('painlessseo', [